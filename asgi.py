@@ -0,0 +1,126 @@
+"""
+Async (ASGI) serving mode.
+
+/chat, /ai-api/predict-goal and /ai-api/predict-sweep run as coroutines: LLM calls are awaited, session
+writes go to a worker thread and Keras inference runs on the bounded pool in
+HydrationService. Every other route falls back to the Flask app, so the JSON
+contract is identical to app.py.
+
+Run with:  python asgi.py   (or: uvicorn asgi:app --host 0.0.0.0 --port 5000)
+"""
+import json
+
+import uvicorn
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app as flask_app
+from routes.chat_routes import build_goal_payload, build_sweep_payload, sweep_error_payload, GOAL_ERROR_PAYLOAD
+from services.dialog_service import dialog_service
+from services.hydration_service import hydration_service
+from services.speculation_service import speculation_service
+
+wsgi_fallback = WsgiToAsgi(flask_app)
+
+
+async def read_json(receive, silent=False):
+    """Like request.get_json(): silent=True turns a malformed body into None instead of raising ValueError."""
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    if not body:
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        if silent:
+            return None
+        raise
+
+
+async def send_json(send, payload, status=200, cors=False):
+    body = json.dumps(payload).encode("utf-8")
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ]
+    if cors:
+        headers.append((b"access-control-allow-origin", b"*"))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def chat(data):
+    data = data if isinstance(data, dict) else {}
+    user_message = (data.get("message") or "").strip()
+    session_id = data.get("session_id", "default_user")
+    local_storage_data = data.get("user_data", {})
+
+    return await dialog_service.handle_message_async(session_id, user_message, local_storage_data), 200
+
+
+async def predict_goal(data):
+    try:
+        result = await hydration_service.predict_intake_async(data or {})
+        return build_goal_payload(result), 200
+    except Exception as e:
+        print(f"Error in dedicated prediction endpoint: {e}")
+        return GOAL_ERROR_PAYLOAD, 500
+
+
+async def predict_sweep(data):
+    data = data if isinstance(data, dict) else {}
+    try:
+        result = await hydration_service.predict_sweep_async(data.get("profile") or {}, data.get("axes"))
+        return build_sweep_payload(result), 200
+    except ValueError as e:
+        return sweep_error_payload(str(e)), 400
+    except Exception as e:
+        print(f"Error in sweep prediction endpoint: {e}")
+        return sweep_error_payload(GOAL_ERROR_PAYLOAD["predicted_message"]), 500
+
+
+NATIVE_ROUTES = {
+    ("POST", "/chat"): chat,
+    ("POST", "/ai-api/predict-goal"): predict_goal,
+    ("POST", "/ai-api/predict-sweep"): predict_sweep,
+}
+# Routes whose Flask view reads the body with get_json(silent=True): malformed JSON counts as no body
+SILENT_JSON_ROUTES = {"/ai-api/predict-goal", "/ai-api/predict-sweep"}
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            hydration_service.shutdown_executor()
+            speculation_service.shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+
+    handler = NATIVE_ROUTES.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+    if handler is None:
+        # CORS preflight and any other route are served by Flask
+        return await wsgi_fallback(scope, receive, send)
+
+    cors = any(name == b"origin" for name, _ in scope.get("headers", []))
+    try:
+        data = await read_json(receive, silent=scope["path"] in SILENT_JSON_ROUTES)
+    except ValueError:
+        return await send_json(send, {"status": "error", "message": "Request body must be valid JSON."}, 400, cors)
+
+    payload, status = await handler(data)
+    await send_json(send, payload, status, cors)
+
+
+if __name__ == "__main__":
+    uvicorn.run("asgi:app", host="0.0.0.0", port=5000)
@@ -0,0 +1,286 @@
+"""
+Micro-benchmarks for the prediction path, without the Flask app.
+
+Times each stage of HydrationService.predict_intake separately for several
+batch sizes (the golden corpus profiles, cycled):
+
+    parse             feature_normalizer.normalize (raw payload -> typed values)
+    map_activity      map_activity_level_to_details
+    intensity         calculate_intensity_score
+    build_matrix      model_row for every profile + np.array
+    scaler_transform  scaler.transform
+    model_predict     model.predict on the scaled batch
+    pipeline          all of the above in one go (should be close to their sum)
+
+plus the cold start of a fresh process: importing the service (load_assets +
+warm-up, including the TensorFlow import for the keras backend), a second
+load_assets in the same process, and peak RSS. Single-profile predict_intake
+latency is reported too, since that is what one /ai-api/predict-goal pays.
+
+Results are written to a JSON file. With --baseline, every measurement is
+compared to the same entry of an earlier results file (by --metric: the fastest
+run, which is the least sensitive to other load on the host, or the median) and
+the run fails (exit 1) if one got slower by more than --max-regression and by
+more than --min-delta-ms.
+
+Examples:
+    python benchmark.py --backend numpy --output bench_numpy.json
+    python benchmark.py --backend numpy --baseline bench_numpy.json --max-regression 0.15
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from golden import build_corpus
+
+# config (and with it INFERENCE_BACKEND) is imported only after --backend is applied
+BENCHMARK_FORMAT_VERSION = 1
+DEFAULT_BATCH_SIZES = [1, 10, 100, 1000, 10000]
+DEFAULT_COLD_RUNS = 3
+DEFAULT_METRIC = "min_ms"
+DEFAULT_MAX_REGRESSION = 0.20
+DEFAULT_MIN_DELTA_MS = 0.05
+# Repeats per measurement shrink with the batch size: about this many rows, within [MIN, MAX]
+ROWS_PER_MEASUREMENT = 50000
+MIN_REPEATS = 15
+MAX_REPEATS = 200
+SINGLE_PROFILE_REPEATS = 200
+
+STAGES = ["parse", "map_activity", "intensity", "build_matrix", "scaler_transform", "model_predict", "pipeline"]
+
+COLD_START_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+from services.hydration_service import hydration_service
+import_ms = (time.perf_counter() - started) * 1000.0
+if not hydration_service.ready:
+    raise SystemExit("HydrationService did not become ready")
+started = time.perf_counter()
+hydration_service.load_assets()
+reload_ms = (time.perf_counter() - started) * 1000.0
+try:
+    with open("/proc/self/status") as f:
+        rss_mb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:")) / 1024.0
+except OSError:
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+print(json.dumps({"import_and_init_ms": import_ms, "warm_up_ms": hydration_service.warmup_ms, "load_assets_warm_ms": reload_ms, "peak_rss_mb": rss_mb}))
+"""
+
+
+def summarize(timings_ms, rows=1):
+    timings_ms = np.asarray(timings_ms)
+    median = float(np.median(timings_ms))
+    return {
+        "median_ms": median,
+        "p95_ms": float(np.percentile(timings_ms, 95)),
+        "min_ms": float(timings_ms.min()),
+        "per_row_us": median * 1000.0 / rows,
+        "repeats": len(timings_ms),
+    }
+
+
+def measure(fn, repeats):
+    """
+    Runs fn once untimed (caches, keras retracing for a new batch shape), then
+    `repeats` timed runs with the garbage collector off, as timeit does.
+    """
+    fn()
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000.0)
+    finally:
+        gc.enable()
+    return timings
+
+
+def stage_functions(service, normalizer, profiles):
+    """One zero-argument callable per stage; each stage's input is precomputed by the previous one."""
+    values_list = [normalizer.normalize(data)["values"] for data in profiles]
+    details = [
+        service.map_activity_level_to_details(v["activity"], v["sub_activity"], v["age"], v["weight"], v["gender"])
+        for v in values_list
+    ]
+    intensity_scores = [
+        service.calculate_intensity_score(d["activity_type"], d["duration_minutes"], d["pace"], d["terrain_type"], d["sweat_level"])
+        for d in details
+    ]
+    X = np.array([service.model_row(v, d, s) for v, d, s in zip(values_list, details, intensity_scores)])
+    X_scaled = service.scaler.transform(X)
+
+    def pipeline():
+        features = [normalizer.normalize(data)["values"] for data in profiles]
+        X, _, _ = service.build_model_input(features)
+        return service.model.predict(service.scaler.transform(X), verbose=0)
+
+    return {
+        "parse": lambda: [normalizer.normalize(data) for data in profiles],
+        "map_activity": lambda: [
+            service.map_activity_level_to_details(v["activity"], v["sub_activity"], v["age"], v["weight"], v["gender"])
+            for v in values_list
+        ],
+        "intensity": lambda: [
+            service.calculate_intensity_score(d["activity_type"], d["duration_minutes"], d["pace"], d["terrain_type"], d["sweat_level"])
+            for d in details
+        ],
+        "build_matrix": lambda: np.array([service.model_row(v, d, s) for v, d, s in zip(values_list, details, intensity_scores)]),
+        "scaler_transform": lambda: service.scaler.transform(X),
+        "model_predict": lambda: service.model.predict(X_scaled, verbose=0),
+        "pipeline": pipeline,
+    }
+
+
+def benchmark_stages(service, normalizer, batch_sizes):
+    corpus = build_corpus()
+    results = {}
+    for batch_size in batch_sizes:
+        profiles = [corpus[i % len(corpus)] for i in range(batch_size)]
+        repeats = max(MIN_REPEATS, min(MAX_REPEATS, ROWS_PER_MEASUREMENT // batch_size))
+        stages = stage_functions(service, normalizer, profiles)
+        results[str(batch_size)] = {name: summarize(measure(stages[name], repeats), batch_size) for name in STAGES}
+        stage_sum = sum(results[str(batch_size)][name]["median_ms"] for name in STAGES if name != "pipeline")
+        print(f"  batch {batch_size:>6}: pipeline {results[str(batch_size)]['pipeline']['median_ms']:9.3f} ms "
+              f"(stage sum {stage_sum:9.3f} ms, {repeats} repeats)")
+    return results
+
+
+def benchmark_single_profile(service):
+    profile = dict(build_corpus()[0])
+    return summarize(measure(lambda: service.predict_intake(dict(profile)), SINGLE_PROFILE_REPEATS))
+
+
+def benchmark_cold_start(runs):
+    """Runs COLD_START_PROBE in `runs` fresh interpreters (same INFERENCE_BACKEND) and takes the median of each field."""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", COLD_START_PROBE],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    cold_start = {key: float(np.median([sample[key] for sample in samples])) for key in samples[0]}
+    cold_start["runs"] = runs
+    return cold_start
+
+
+def flatten_timings(results, metric):
+    """{label: ms} for every comparable entry of a results file; cold start is always the median over its runs."""
+    timings = {"predict_intake/single": results["single_profile"][metric]}
+    for batch_size, stages in results["stages"].items():
+        for name, summary in stages.items():
+            timings[f"{name}/batch={batch_size}"] = summary[metric]
+    for key in ["import_and_init_ms", "load_assets_warm_ms", "warm_up_ms"]:
+        if key in results.get("cold_start", {}):
+            timings[f"cold_start/{key[:-3]}"] = results["cold_start"][key]
+    return timings
+
+
+def compare(baseline, current, metric, max_regression, min_delta_ms):
+    """Prints every shared entry side by side; returns the labels that regressed."""
+    if baseline["meta"].get("backend") != current["meta"].get("backend"):
+        print(f"⚠️  Baseline backend {baseline['meta'].get('backend')} differs from {current['meta'].get('backend')}")
+    old, new = flatten_timings(baseline, metric), flatten_timings(current, metric)
+    regressions = []
+    print(f"\n🔎 Against baseline from {baseline['meta'].get('created')} "
+          f"({metric}; regression: > {max_regression:.0%} and > {min_delta_ms} ms slower)")
+    print(f"  {'':<34}{'baseline':>14}{'current':>14}{'change':>11}")
+    for label in [label for label in new if label in old]:
+        change = (new[label] - old[label]) / old[label] if old[label] else 0.0
+        regressed = change > max_regression and new[label] - old[label] > min_delta_ms
+        marker = "  ❌" if regressed else ""
+        print(f"  {label:<34}{old[label]:>11.3f} ms{new[label]:>11.3f} ms{change:>+10.1%}{marker}")
+        if regressed:
+            regressions.append(label)
+    return regressions
+
+
+def run_benchmark(batch_sizes, cold_runs):
+    from config import INFERENCE_BACKEND, MODEL_PATH, QUANTIZED_MODEL_PATH
+    from services.feature_normalizer import feature_normalizer
+    from services.hydration_service import hydration_service
+
+    if not hydration_service.ready:
+        raise SystemExit("❌ HydrationService is not ready; refusing to benchmark the fallback prediction.")
+
+    print(f"⏱️  Stage timings ({INFERENCE_BACKEND} backend):")
+    results = {
+        "meta": {
+            "version": BENCHMARK_FORMAT_VERSION,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "backend": INFERENCE_BACKEND,
+            "model": QUANTIZED_MODEL_PATH if INFERENCE_BACKEND == "quantized" else MODEL_PATH,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "stages": benchmark_stages(hydration_service, feature_normalizer, batch_sizes),
+        "single_profile": benchmark_single_profile(hydration_service),
+    }
+    print(f"⏱️  predict_intake, one profile: {results['single_profile']['median_ms']:.3f} ms median, "
+          f"{results['single_profile']['p95_ms']:.3f} ms p95")
+
+    if cold_runs:
+        results["cold_start"] = benchmark_cold_start(cold_runs)
+        cold = results["cold_start"]
+        print(f"⏱️  Cold start (median of {cold_runs}): import + load_assets + warm-up {cold['import_and_init_ms']:.0f} ms "
+              f"(warm-up {cold['warm_up_ms']:.0f} ms), load_assets again {cold['load_assets_warm_ms']:.0f} ms, "
+              f"peak RSS {cold['peak_rss_mb']:.0f} MB")
+    return results
+
+
+def print_stage_table(results):
+    batch_sizes = list(results["stages"])
+    print(f"\n  {'median ms':<18}" + "".join(f"{'batch ' + b:>14}" for b in batch_sizes))
+    for name in STAGES:
+        print(f"  {name:<18}" + "".join(f"{results['stages'][b][name]['median_ms']:>14.3f}" for b in batch_sizes))
+    print(f"  {'pipeline µs/row':<18}" + "".join(f"{results['stages'][b]['pipeline']['per_row_us']:>14.2f}" for b in batch_sizes))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the prediction path stage by stage.")
+    parser.add_argument("--backend", type=str, choices=["keras", "numpy", "quantized"], default=None, help="Inference backend (default: INFERENCE_BACKEND).")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES, help="Profiles per measured call.")
+    parser.add_argument("--cold-runs", type=int, default=DEFAULT_COLD_RUNS, help="Fresh processes for the cold-start measurement (0 = skip).")
+    parser.add_argument("--output", type=str, default=None, help="Results JSON path (default: benchmark_<timestamp>.json).")
+    parser.add_argument("--baseline", type=str, default=None, help="Earlier results JSON to compare against.")
+    parser.add_argument("--metric", type=str, choices=["min_ms", "median_ms"], default=DEFAULT_METRIC, help="Which timing of each measurement is compared.")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION, help="Allowed slowdown as a fraction of the baseline timing.")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS, help="Slowdowns smaller than this (ms) are never regressions.")
+    args = parser.parse_args()
+
+    # The backend is read when the service module is imported (here and in the cold-start probes)
+    if args.backend:
+        os.environ["INFERENCE_BACKEND"] = args.backend
+
+    results = run_benchmark(args.batch_sizes, args.cold_runs)
+    print_stage_table(results)
+
+    output_path = args.output or f"benchmark_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"\n✅ Results saved to: {output_path}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("version") != BENCHMARK_FORMAT_VERSION:
+            raise SystemExit(f"❌ Unsupported baseline version: {baseline['meta'].get('version')}")
+        regressions = compare(baseline, results, args.metric, args.max_regression, args.min_delta_ms)
+        if regressions:
+            print(f"\n❌ {len(regressions)} measurement(s) regressed: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ No regressions against the baseline.")
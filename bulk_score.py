@@ -0,0 +1,242 @@
+"""
+Offline bulk scoring of user profiles with HydrationService.
+
+Reads a CSV or JSONL file of profiles in the raw shape /ai-api/predict-goal
+accepts (one profile per row/line), normalizes them with feature_normalizer and
+predicts them in batches of --batch-size rows spread over a process pool.
+Results are written in input order, batch by batch, so memory stays bounded
+for any input size. Output columns:
+
+    id, status, predicted_goal_ml, intensity_score, message_category, error
+
+id is the profile's --id-column value, or its row number (CSV data row / JSONL
+line). message_category is the goal message variant /ai-api/predict-goal would
+show (HydrationService.goal_category). Lines that aren't a JSON object get
+status "error" and are not scored.
+
+Examples:
+    python bulk_score.py profiles.csv scored.csv --backend numpy
+    python bulk_score.py profiles.jsonl scored.jsonl --workers 8 --batch-size 20000
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# config and the services are imported in the workers, after --backend is applied
+DEFAULT_BATCH_SIZE = 10000
+DEFAULT_ID_COLUMN = "id"
+SUPPORTED_FORMATS = [".csv", ".jsonl"]
+OUTPUT_COLUMNS = ["id", "status", "predicted_goal_ml", "intensity_score", "message_category", "error"]
+
+
+def file_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported file type: {path} (expected one of {SUPPORTED_FORMATS})")
+    return extension
+
+
+def read_csv_batches(path, batch_size):
+    """Yields lists of (row_number, data, error); every cell is read as text, like a form field."""
+    row_number = 0
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=batch_size):
+        batch = []
+        for record in chunk.to_dict("records"):
+            row_number += 1
+            # An empty cell means the field wasn't sent
+            batch.append((row_number, {key: value for key, value in record.items() if value != ""}, None))
+        yield batch
+
+
+def read_jsonl_batches(path, batch_size):
+    """Yields lists of (line_number, data, error); blank lines are skipped."""
+    batch = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+                error = None if isinstance(data, dict) else "line is not a JSON object"
+            except json.JSONDecodeError as e:
+                data, error = None, f"invalid JSON: {e.msg}"
+            batch.append((line_number, data if error is None else None, error))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+class ResultWriter:
+    def __init__(self, path):
+        self.format = file_format(path)
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        if self.format == ".csv":
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=OUTPUT_COLUMNS)
+            self.csv_writer.writeheader()
+
+    def write(self, rows):
+        if self.format == ".csv":
+            self.csv_writer.writerows(rows)
+        else:
+            self.file.writelines(json.dumps(row) + "\n" for row in rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def init_worker(threads, model_path=None, scaler_path=None, quantized_model_path=None):
+    """Loads the model once per worker; INFERENCE_BACKEND comes from the parent's environment."""
+    from config import INFERENCE_BACKEND
+    if INFERENCE_BACKEND == "keras":
+        # Must be set before the service imports TensorFlow's runtime
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    from services.hydration_service import hydration_service
+    if model_path or scaler_path or quantized_model_path:
+        from config import MODEL_PATH, SCALER_PATH, QUANTIZED_MODEL_PATH
+        hydration_service.load_assets(
+            model_path=model_path or MODEL_PATH,
+            scaler_path=scaler_path or SCALER_PATH,
+            quantized_model_path=quantized_model_path or QUANTIZED_MODEL_PATH,
+        )
+        hydration_service.warm_up()
+    if not hydration_service.ready:
+        raise RuntimeError("HydrationService is not ready; refusing to score with the fallback prediction.")
+
+
+def score_batch(batch, id_column):
+    """Normalizes and predicts one batch in a single model call; returns output rows in input order."""
+    from services.feature_normalizer import feature_normalizer
+    from services.hydration_service import hydration_service
+
+    values_list = [feature_normalizer.normalize(data)["values"] for _, data, error in batch if error is None]
+    X, _, intensity_scores = hydration_service.build_model_input(values_list)
+    predictions = hydration_service.predict_rows(X) if values_list else []
+    scored = iter(zip(values_list, intensity_scores, predictions))
+
+    rows = []
+    for row_number, data, error in batch:
+        if error is not None:
+            rows.append({"id": row_number, "status": "error", "error": error})
+            continue
+        values, intensity_score, predicted_intake = next(scored)
+        rows.append({
+            "id": data.get(id_column, row_number),
+            "status": "success",
+            "predicted_goal_ml": predicted_intake,
+            "intensity_score": intensity_score,
+            "message_category": hydration_service.goal_category(values["complication"], intensity_score),
+        })
+    return rows
+
+
+def bulk_score(
+    input_path,
+    output_path,
+    batch_size=DEFAULT_BATCH_SIZE,
+    workers=None,
+    id_column=DEFAULT_ID_COLUMN,
+    model_path=None,
+    scaler_path=None,
+    quantized_model_path=None,
+):
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+    reader = read_csv_batches if file_format(input_path) == ".csv" else read_jsonl_batches
+    cpu_count = os.cpu_count() or 1
+    workers = cpu_count if workers is None else workers
+    threads_per_worker = max(1, cpu_count // max(1, workers))
+    init_args = (threads_per_worker, model_path, scaler_path, quantized_model_path)
+
+    writer = ResultWriter(output_path)
+    totals = {"rows": 0, "errors": 0, "batches": 0}
+    started = time.perf_counter()
+    first_result_at = first_batch_rows = None
+
+    def write(rows):
+        nonlocal first_result_at, first_batch_rows
+        writer.write(rows)
+        if first_result_at is None:
+            first_result_at, first_batch_rows = time.perf_counter(), len(rows)
+        totals["rows"] += len(rows)
+        totals["errors"] += sum(row["status"] == "error" for row in rows)
+        totals["batches"] += 1
+        elapsed = time.perf_counter() - started
+        print(f"  [{totals['batches']}] {totals['rows']} rows written, {totals['rows'] / elapsed:,.0f} rows/s")
+
+    print(f"🔎 Scoring {input_path} in batches of {batch_size} on "
+          f"{workers or 'no'} worker processes" + (f" ({threads_per_worker} threads each)" if workers else " (in-process)"))
+    try:
+        if workers == 0:
+            init_worker(*init_args)
+            for batch in reader(input_path, batch_size):
+                write(score_batch(batch, id_column))
+        else:
+            # spawn: TensorFlow is not fork-safe; each worker loads the model once in init_worker
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=init_args,
+            ) as pool:
+                # Bounded and in order: at most 2 batches per worker are read ahead of the writer
+                pending = deque()
+                for batch in reader(input_path, batch_size):
+                    pending.append(pool.submit(score_batch, batch, id_column))
+                    if len(pending) >= 2 * workers:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ Scored {totals['rows']} rows ({totals['errors']} errors) in {elapsed:.1f}s: "
+          f"{totals['rows'] / elapsed:,.0f} rows/s overall")
+    if totals["batches"] > 1:
+        # Excludes worker start-up and model loading
+        steady_rows = totals["rows"] - first_batch_rows
+        print(f"  steady state after the first batch: {steady_rows / (time.perf_counter() - first_result_at):,.0f} rows/s")
+    print(f"✅ Results saved to: {output_path}")
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV/JSONL file of profiles offline.")
+    parser.add_argument("input", type=str, help="Profiles (.csv or .jsonl) in the /ai-api/predict-goal shape.")
+    parser.add_argument("output", type=str, help="Results file (.csv or .jsonl).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Profiles per model call.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU cores; 0 = score in this process).")
+    parser.add_argument("--id-column", type=str, default=DEFAULT_ID_COLUMN, help="Field copied to the output id (falls back to the row number).")
+    parser.add_argument("--backend", type=str, choices=["keras", "numpy", "quantized"], default=None, help="Inference backend (default: INFERENCE_BACKEND).")
+    parser.add_argument("--model", type=str, default=None, help="Score with this .h5 instead of MODEL_PATH.")
+    parser.add_argument("--scaler", type=str, default=None, help="Score with this scaler instead of SCALER_PATH.")
+    parser.add_argument("--quantized-model", type=str, default=None, help="Score with this .npz instead of QUANTIZED_MODEL_PATH.")
+    args = parser.parse_args()
+
+    # Read by config when the workers import it
+    if args.backend:
+        os.environ["INFERENCE_BACKEND"] = args.backend
+
+    bulk_score(
+        args.input,
+        args.output,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        id_column=args.id_column,
+        model_path=args.model,
+        scaler_path=args.scaler,
+        quantized_model_path=args.quantized_model,
+    )
@@ -3,14 +3,33 @@ import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Paths
-USER_SESSIONS_PATH = os.path.join(BASE_DIR, "user_sessions.json")
+USER_SESSIONS_PATH = os.path.join(BASE_DIR, "user_sessions.json")  # legacy store, imported into the database once
+USER_SESSIONS_DB_PATH = os.environ.get("USER_SESSIONS_DB_PATH", os.path.join(BASE_DIR, "user_sessions.db"))
 MODEL_PATH = os.path.join(BASE_DIR, "maruf_89d898f0-581c-4981-b8e9-7c4db1097590.h5")
 INTENTS_PATH = os.path.join(BASE_DIR, "intents.json")
 SCALER_PATH = os.path.join(BASE_DIR, "maruf_62fc92d4-a74e-4ada-b3e1-239aa6261687.pkl")
+FEATURE_CACHE_DIR = os.path.join(BASE_DIR, "feature_cache")
+SESSION_DB_TIMEOUT_SECONDS = 5.0  # how long a session write waits for another worker's write
 
 # Ollama Config
 OLLAMA_MODEL_NAME = "gemma3:1b"
 OLLAMA_BASE_URL = "http://localhost:11434"
+# Comma-separated Ollama servers to spread generations over (default: OLLAMA_BASE_URL alone)
+OLLAMA_BASE_URLS = [url.strip() for url in os.environ.get("OLLAMA_BASE_URLS", OLLAMA_BASE_URL).split(",") if url.strip()]
+OLLAMA_ROUTING = os.environ.get("OLLAMA_ROUTING", "least_outstanding")  # or "latency"
+OLLAMA_SESSION_AFFINITY = os.environ.get("OLLAMA_SESSION_AFFINITY", "1") == "1"
+OLLAMA_AFFINITY_SLACK = 1  # extra outstanding requests tolerated to keep a session on its backend
+OLLAMA_MAX_AFFINITY_SESSIONS = 10000
+OLLAMA_BACKEND_FAILURE_THRESHOLD = 2  # consecutive failures before a backend is marked down
+OLLAMA_BACKEND_RETRY_SECONDS = 10.0
+OLLAMA_LATENCY_EWMA_ALPHA = 0.3
+OLLAMA_HEALTH_TIMEOUT_SECONDS = 2.0
+OLLAMA_HEALTH_CACHE_SECONDS = 5.0
+# Concurrent requests with the same model, options and message payload share one generation
+LLM_COALESCING_ENABLED = os.environ.get("LLM_COALESCING_ENABLED", "1") == "1"
+
+# Readiness (/readyz): the model must be warmed up; Ollama is reported but only required if set
+READINESS_REQUIRES_OLLAMA = os.environ.get("READINESS_REQUIRES_OLLAMA", "0") == "1"
 
 # Defaults
 DEFAULT_VALUES = {
@@ -28,6 +47,14 @@ DEFAULT_VALUES = {
     "humidity_scale": 3
 }
 
+# Plausible (min, max) of the numeric features; explicit sweep values outside them are rejected
+FEATURE_RANGES = {
+    "age": (1, 120),
+    "weight": (1.0, 300.0),
+    "temperature": (-30.0, 55.0),
+    "humidity_scale": (1, 5),
+}
+
 # Feature Lists
 REQUIRED_FEATURES = [
     "age",
@@ -52,9 +79,86 @@ INDOORS_MAP = {"no": 0, "indoors": 1, "outdoors": 0}
 WET_GROUND_MAP = {"no": 0, "yes": 1}
 BINARY_MAP = {"no": 0, "yes": 1}
 
+# Sub-activities offered for each activity level
+SUB_ACTIVITY_OPTIONS = {
+    0: ["Yoga/Stretching", "Light Running", "Easy Cycling"],
+    1: ["Gym Workout", "Moderate Running"],
+    2: ["Intense Running", "Intense Sports"],
+}
+
 # Reverse Mappings
 GENDER_MAP_REVERSE = {v: k for k, v in GENDER_MAP.items()}
 ACTIVITY_MAP_REVERSE = {v: k for k, v in ACTIVITY_MAP.items()}
 COMPLICATION_MAP_REVERSE = {v: k for k, v in COMPLICATION_MAP.items()}
 
 STANDARD_GLASS_ML = 250
+
+# Dialog pacing hints, returned to the client as "delay_ms" instead of sleeping the worker
+DIALOG_DELAY_MS = 1000
+PREDICTION_DELAY_MS = 2000
+
+
+# Inference backend: "keras" loads MODEL_PATH with TensorFlow, "numpy" runs the same
+# Dense weights with a NumPy forward pass (no TensorFlow import, fork-safe), and
+# "quantized" runs the NumPy forward pass from QUANTIZED_MODEL_PATH, a float16/int8
+# export that also carries the scaler (see `python model_trainer.py --mode quantize`)
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "keras")
+QUANTIZED_MODEL_PATH = os.environ.get("QUANTIZED_MODEL_PATH", os.path.splitext(MODEL_PATH)[0] + ".int8.npz")
+
+
+# What-if Sweep Config (/ai-api/predict-sweep)
+# An axis sweeps one REQUIRED_FEATURES field, or "activity_option" ("<level>/<sub-activity>")
+SWEEP_MAX_AXES = 2
+SWEEP_MAX_POINTS = 500
+SWEEP_ACTIVITY_AXIS = "activity_option"
+SWEEP_RANGE_FIELDS = ["age", "weight", "temperature", "humidity_scale"]
+# Values swept when an axis gives only its field
+SWEEP_DEFAULT_VALUES = {
+    "gender": ["female", "male"],
+    "activity": ["low", "medium", "high"],
+    "humidity_scale": [1, 2, 3, 4, 5],
+    "complication": ["none", "mild", "severe"],
+    "is_indoors": ["indoors", "outdoors"],
+    "is_ground_wet": ["no", "yes"],
+    "is_windy_or_fanned": ["no", "yes"],
+    "is_direct_sun": ["no", "yes"],
+}
+
+
+# Speculative Prediction Config
+# Once the dialog's remaining questions are all multiple-choice, the prediction for every
+# combination of answers is computed in the background; the completion turn becomes a lookup.
+SPECULATION_ENABLED = os.environ.get("SPECULATION_ENABLED", "1") == "1"
+SPECULATION_MAX_COMBINATIONS = 64
+SPECULATION_WORKERS = 1
+SPECULATION_WAIT_SECONDS = 1.0  # how long the completion turn waits for a batch still running
+SPECULATION_MAX_SESSIONS = 1000
+
+
+# Async Serving Config (asgi.py)
+# Keras inference is offloaded to a small thread pool; extra requests wait on the event loop.
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", "2"))
+INFERENCE_MAX_PENDING = int(os.environ.get("INFERENCE_MAX_PENDING", "64"))
+
+
+# Pre-fork Server Config (prefork.py)
+PREFORK_BIND = os.environ.get("PREFORK_BIND", "0.0.0.0:5000")
+PREFORK_WORKERS = int(os.environ.get("PREFORK_WORKERS", str(os.cpu_count() or 2)))
+PREFORK_THREADS = int(os.environ.get("PREFORK_THREADS", "4"))
+PREFORK_MAX_REQUESTS = int(os.environ.get("PREFORK_MAX_REQUESTS", "5000"))  # 0 = never recycle
+PREFORK_MAX_REQUESTS_JITTER = int(os.environ.get("PREFORK_MAX_REQUESTS_JITTER", "500"))
+PREFORK_GRACEFUL_TIMEOUT = int(os.environ.get("PREFORK_GRACEFUL_TIMEOUT", "30"))
+PREFORK_WORKER_MAX_PRIVATE_MB = float(os.environ.get("PREFORK_WORKER_MAX_PRIVATE_MB", "0"))  # 0 = no limit
+PREFORK_MEMORY_REPORT_EVERY = int(os.environ.get("PREFORK_MEMORY_REPORT_EVERY", "500"))
+
+
+# Profiling Config
+# Set PROFILING_ENABLED=1 to profile every request, or set PROFILING_ADMIN_TOKEN and
+# send it in the "X-Profile-Token" header to profile a single request on demand.
+# The same header and token are required for GET /stats (disabled while no token is set).
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+PROFILING_ADMIN_TOKEN = os.environ.get("PROFILING_ADMIN_TOKEN", "")
+PROFILING_OUTPUT_DIR = os.environ.get("PROFILING_OUTPUT_DIR", os.path.join(BASE_DIR, "profiles"))
+PROFILING_FORMAT = os.environ.get("PROFILING_FORMAT", "pstats")  # "pstats" or "collapsed"
+PROFILING_WINDOW_SECONDS = float(os.environ.get("PROFILING_WINDOW_SECONDS", "0"))  # 0 = one file per request
+PROFILING_SAMPLE_INTERVAL_MS = float(os.environ.get("PROFILING_SAMPLE_INTERVAL_MS", "5"))
@@ -3,179 +3,253 @@ import numpy as np
 import datetime
 import random
 import string
-
-np.random.seed(42)
-data_size = 500
+import argparse
+import time
 
 # ---------------------------
-# 1. BASIC USER CHARACTERISTICS
+# Configuration
 # ---------------------------
-age = np.random.randint(18, 58, size=data_size)
-gender = np.random.randint(0, 2, size=data_size)
-weight = np.random.randint(50, 100, size=data_size)
-
-# ---------------------------
-# 2. ENVIRONMENTAL FACTORS
-# ---------------------------
-# --- REMOVED RAW 'humidity' VARIABLE ---
-# humidity = np.random.randint(0, 101, size=data_size)
-raw_humidity_for_calc = np.random.randint(0, 101, size=data_size) # Temp variable for generating scale
-temperature = np.random.randint(15, 40, size=data_size)
-is_indoors = np.random.randint(0, 2, size=data_size)
-is_ground_wet = np.random.randint(0, 2, size=data_size)
-is_windy_or_fanned = np.random.randint(0, 2, size=data_size)
-is_direct_sun = np.random.randint(0, 2, size=data_size)
+DEFAULT_ROWS = 500
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_SIZE = 100_000
+# Rows are generated in fixed blocks, each from its own seed stream, so the
+# dataset for a given (seed, rows) does not depend on the chunk size
+GENERATION_BLOCK_SIZE = 10_000
+
+COLUMNS = [
+    "age",
+    "gender",
+    "weight",
+    "humidity_scale",
+    "temperature",
+    "complication",
+    "is_indoors",
+    "is_ground_wet",
+    "is_windy_or_fanned",
+    "is_direct_sun",
+    "activity_type",
+    "duration_minutes",
+    "pace",
+    "terrain_type",
+    "sweat_level",
+    "intensity_score",
+    "water_intake",
+]
 
 # --- Categorized Humidity Level ---
 # Scale 1: 80-100% (Very High)
 # Scale 2: 60-79% (High)
 # Scale 3: 40-59% (Moderate/Comfortable)
 # Scale 4: 20-39% (Low)
-# Scale 5: 0-19%  (Very Low)
-humidity_scale = []
-for h in raw_humidity_for_calc: # Use the temporary raw value for calculation
-    if h >= 80:
-        humidity_scale.append(1)
-    elif h >= 60:
-        humidity_scale.append(2)
-    elif h >= 40:
-        humidity_scale.append(3)
-    elif h >= 20:
-        humidity_scale.append(4)
-    else:
-        humidity_scale.append(5)
-
-humidity_scale = np.array(humidity_scale)
+# Scale 5: 0-19%  (Very Low)
+HUMIDITY_SCALE_EDGES = [20, 40, 60, 80]
 
-# ---------------------------
-# 3. ILLNESS / COMPLICATION
-# ---------------------------
-complication = np.random.randint(0, 3, size=data_size)
-complication_adjustments = np.array([0, 300, 600])
+COMPLICATION_ADJUSTMENTS = np.array([0, 300, 600])
 
-# ---------------------------
-# 4. NEW ACTIVITY SYSTEM
-# ---------------------------
-activity_type = np.random.randint(0, 6, size=data_size)
-
-duration_minutes = []
-pace = [] 
-terrain_type = []
-sweat_level = []
-
-for a in activity_type:
-    if a == 0: # walking
-        duration_minutes.append(np.random.randint(10, 90))
-        pace.append(np.random.uniform(3, 6))
-    elif a == 1: # running
-        duration_minutes.append(np.random.randint(10, 60))
-        pace.append(np.random.uniform(6, 12))
-    elif a == 2: # cycling
-        duration_minutes.append(np.random.randint(20, 120))
-        pace.append(np.random.uniform(10, 28))
-    elif a == 3: # gym workout
-        duration_minutes.append(np.random.randint(20, 90))
-        pace.append(np.random.uniform(2, 5)) 
-    elif a == 4: # yoga
-        duration_minutes.append(np.random.randint(15, 60))
-        pace.append(np.random.uniform(2, 4))
-    elif a == 5: # sports
-        duration_minutes.append(np.random.randint(20, 120))
-        pace.append(np.random.uniform(4, 10))
-
-    terrain_type.append(np.random.randint(0, 3))
-    sweat_level.append(np.random.randint(0, 4))
-
-duration_minutes = np.array(duration_minutes)
-pace = np.array(pace, dtype=float)
-terrain_type = np.array(terrain_type)
-sweat_level = np.array(sweat_level)
+# Activity tables, indexed by activity_type:
+# 0 walking, 1 running, 2 cycling, 3 gym workout, 4 yoga, 5 sports
+DURATION_LOW = np.array([10, 10, 20, 20, 15, 20])
+DURATION_HIGH = np.array([90, 60, 120, 90, 60, 120])  # exclusive, like np.random.randint
+PACE_LOW = np.array([3.0, 6.0, 10.0, 2.0, 2.0, 4.0])
+PACE_HIGH = np.array([6.0, 12.0, 28.0, 5.0, 4.0, 10.0])
 
-# ---------------------------
-# 5. INTENSITY SCORE
-# ---------------------------
-activity_base_map = {0: 0.10, 1: 0.30, 2: 0.25, 3: 0.20, 4: 0.05, 5: 0.30}
-activity_base = np.array([activity_base_map[a] for a in activity_type])
-
-pace_multiplier = np.zeros(data_size)
-for i in range(data_size):
-    a = activity_type[i]
-    p = pace[i]
-    if a == 0: pace_multiplier[i] = 0.05 if p < 4 else 0.10 if p < 5 else 0.20
-    elif a == 1: pace_multiplier[i] = 0.20 if p < 8 else 0.30 if p < 10 else 0.40
-    elif a == 2: pace_multiplier[i] = 0.10 if p < 16 else 0.20 if p < 22 else 0.30
-    elif a == 3: pace_multiplier[i] = 0.05 
-    elif a == 4: pace_multiplier[i] = 0.02
-    elif a == 5: pace_multiplier[i] = 0.10 if p < 6 else 0.20 if p < 8 else 0.30
-
-terrain_multiplier = np.where(terrain_type == 1, 0.10, np.where(terrain_type == 2, 0.05, 0.00))
-sweat_multiplier = sweat_level * 0.05
-duration_component = duration_minutes * 0.003
-
-intensity_score = activity_base + pace_multiplier + terrain_multiplier + sweat_multiplier + duration_component
-intensity_score = np.clip(intensity_score, 0, 1)
+ACTIVITY_BASE = np.array([0.10, 0.30, 0.25, 0.20, 0.05, 0.30])
+
+# Pace multiplier: PACE_MULT_LOW if pace < first threshold, PACE_MULT_MID if pace < second, else PACE_MULT_HIGH
+PACE_THRESHOLD_1 = np.array([4.0, 8.0, 16.0, np.inf, np.inf, 6.0])
+PACE_THRESHOLD_2 = np.array([5.0, 10.0, 22.0, np.inf, np.inf, 8.0])
+PACE_MULT_LOW = np.array([0.05, 0.20, 0.10, 0.05, 0.02, 0.10])
+PACE_MULT_MID = np.array([0.10, 0.30, 0.20, 0.05, 0.02, 0.20])
+PACE_MULT_HIGH = np.array([0.20, 0.40, 0.30, 0.05, 0.02, 0.30])
+
+TERRAIN_MULTIPLIER = np.array([0.00, 0.10, 0.05])
+
+# Humidity stress, indexed by humidity_scale (index 0 unused)
+HUMIDITY_STRESS = np.array([0.0, 0.15, 0.05, 0.00, 0.10, 0.20])
 
-# ---------------------------
-# 6. WATER INTAKE (UPDATED WITH IMAGE LOGIC)
-# ---------------------------
 BASE_ML_PER_KG = 30.0
-base_intake = weight * BASE_ML_PER_KG
-activity_adjustment = intensity_score * 1500
-base_intake += complication_adjustments[complication] + activity_adjustment
-
-stress_factor = np.zeros(data_size)
-stress_factor += np.maximum(0, temperature - 25) * 0.01
-stress_factor += is_direct_sun * 0.20
-stress_factor += is_windy_or_fanned * 0.10
-stress_factor -= is_indoors * 0.15
-
-# --- APPLYING HUMIDITY SCALE RISKS ---
-# This remains the same as it correctly calculates the stress factor based on the scale
-humidity_stress = np.zeros(data_size)
-for i in range(data_size):
-    h_scale = humidity_scale[i]
-    if h_scale == 1:
-        humidity_stress[i] = 0.15 
-    elif h_scale == 2:
-        humidity_stress[i] = 0.05
-    elif h_scale == 3:
-        humidity_stress[i] = 0.00
-    elif h_scale == 4:
-        humidity_stress[i] = 0.10
-    elif h_scale == 5:
-        humidity_stress[i] = 0.20
-
-stress_factor += humidity_stress
-
-water_intake = np.maximum(base_intake * (1 + stress_factor), 2000)
-water_intake += np.random.normal(0, 100, size=data_size)
 
-# ---------------------------
-# 7. CREATE DATAFRAME (CRITICAL CHANGE HERE)
-# ---------------------------
-df = pd.DataFrame({
-    "age": age,
-    "gender": gender,
-    "weight": weight,
-    "humidity_scale": humidity_scale, 
-    "temperature": temperature,
-    "complication": complication,
-    "is_indoors": is_indoors,
-    "is_ground_wet": is_ground_wet,
-    "is_windy_or_fanned": is_windy_or_fanned,
-    "is_direct_sun": is_direct_sun,
-    "activity_type": activity_type,
-    "duration_minutes": duration_minutes,
-    "pace": pace,
-    "terrain_type": terrain_type,
-    "sweat_level": sweat_level,
-    "intensity_score": intensity_score,
-    "water_intake": water_intake.round(0)
-})
-
-timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-random_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
-random_filename = f"maruf_{timestamp}_{random_suffix}.csv"
-
-df.to_csv(random_filename, index=False)
-print(f"✅ Generated '{random_filename}' with **16 features (scale only)**!")
\ No newline at end of file
+
+def generate_chunk(rng, size):
+    """Generates `size` rows with fully vectorized NumPy; returns a DataFrame with COLUMNS."""
+    # ---------------------------
+    # 1. BASIC USER CHARACTERISTICS
+    # ---------------------------
+    age = rng.integers(18, 58, size=size)
+    gender = rng.integers(0, 2, size=size)
+    weight = rng.integers(50, 100, size=size)
+
+    # ---------------------------
+    # 2. ENVIRONMENTAL FACTORS
+    # ---------------------------
+    raw_humidity_for_calc = rng.integers(0, 101, size=size)  # Temp variable for generating scale
+    temperature = rng.integers(15, 40, size=size)
+    is_indoors = rng.integers(0, 2, size=size)
+    is_ground_wet = rng.integers(0, 2, size=size)
+    is_windy_or_fanned = rng.integers(0, 2, size=size)
+    is_direct_sun = rng.integers(0, 2, size=size)
+
+    humidity_scale = 5 - np.digitize(raw_humidity_for_calc, HUMIDITY_SCALE_EDGES)
+
+    # ---------------------------
+    # 3. ILLNESS / COMPLICATION
+    # ---------------------------
+    complication = rng.integers(0, 3, size=size)
+
+    # ---------------------------
+    # 4. NEW ACTIVITY SYSTEM
+    # ---------------------------
+    activity_type = rng.integers(0, 6, size=size)
+    duration_minutes = rng.integers(DURATION_LOW[activity_type], DURATION_HIGH[activity_type])
+    pace = rng.uniform(PACE_LOW[activity_type], PACE_HIGH[activity_type])
+    terrain_type = rng.integers(0, 3, size=size)
+    sweat_level = rng.integers(0, 4, size=size)
+
+    # ---------------------------
+    # 5. INTENSITY SCORE
+    # ---------------------------
+    pace_multiplier = np.where(
+        pace < PACE_THRESHOLD_1[activity_type],
+        PACE_MULT_LOW[activity_type],
+        np.where(pace < PACE_THRESHOLD_2[activity_type], PACE_MULT_MID[activity_type], PACE_MULT_HIGH[activity_type]),
+    )
+    sweat_multiplier = sweat_level * 0.05
+    duration_component = duration_minutes * 0.003
+
+    intensity_score = (
+        ACTIVITY_BASE[activity_type] + pace_multiplier + TERRAIN_MULTIPLIER[terrain_type]
+        + sweat_multiplier + duration_component
+    )
+    intensity_score = np.clip(intensity_score, 0, 1)
+
+    # ---------------------------
+    # 6. WATER INTAKE
+    # ---------------------------
+    base_intake = weight * BASE_ML_PER_KG
+    base_intake = base_intake + COMPLICATION_ADJUSTMENTS[complication] + intensity_score * 1500
+
+    stress_factor = (
+        np.maximum(0, temperature - 25) * 0.01
+        + is_direct_sun * 0.20
+        + is_windy_or_fanned * 0.10
+        - is_indoors * 0.15
+        + HUMIDITY_STRESS[humidity_scale]
+    )
+
+    water_intake = np.maximum(base_intake * (1 + stress_factor), 2000)
+    water_intake += rng.normal(0, 100, size=size)
+
+    return pd.DataFrame({
+        "age": age,
+        "gender": gender,
+        "weight": weight,
+        "humidity_scale": humidity_scale,
+        "temperature": temperature,
+        "complication": complication,
+        "is_indoors": is_indoors,
+        "is_ground_wet": is_ground_wet,
+        "is_windy_or_fanned": is_windy_or_fanned,
+        "is_direct_sun": is_direct_sun,
+        "activity_type": activity_type,
+        "duration_minutes": duration_minutes,
+        "pace": pace,
+        "terrain_type": terrain_type,
+        "sweat_level": sweat_level,
+        "intensity_score": intensity_score,
+        "water_intake": water_intake.round(0),
+    }, columns=COLUMNS)
+
+
+def check_sizes(rows, chunk_size):
+    if rows <= 0:
+        raise ValueError(f"rows must be a positive integer, got {rows}")
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be a positive integer, got {chunk_size}")
+
+
+def iter_chunks(rows=DEFAULT_ROWS, seed=DEFAULT_SEED, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yields DataFrames of at most chunk_size rows. Block i of GENERATION_BLOCK_SIZE rows is
+    drawn from the i-th child of np.random.SeedSequence(seed), so the rows are the same for
+    any chunk_size. Datasets generated before per-block seeding (a single stream, which
+    depended on chunk_size) can't be reproduced: seed 42 now gives different rows.
+    """
+    check_sizes(rows, chunk_size)
+    seed_sequence = np.random.SeedSequence(seed)
+    pending, pending_rows = [], 0
+    remaining = rows
+    while remaining > 0:
+        size = min(GENERATION_BLOCK_SIZE, remaining)
+        pending.append(generate_chunk(np.random.default_rng(seed_sequence.spawn(1)[0]), size))
+        pending_rows += size
+        remaining -= size
+        # Re-cut the generated blocks into chunk_size pieces; at most one chunk plus one block is held
+        while pending_rows >= chunk_size or (remaining == 0 and pending_rows):
+            frame = pending[0] if len(pending) == 1 else pd.concat(pending, ignore_index=True)
+            yield frame.iloc[:chunk_size]
+            rest = frame.iloc[chunk_size:]
+            pending, pending_rows = ([rest] if len(rest) else []), len(rest)
+
+
+def default_output_path(fmt="csv"):
+    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    random_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
+    return f"maruf_{timestamp}_{random_suffix}.{fmt}"
+
+
+def generate_dataset(rows=DEFAULT_ROWS, seed=DEFAULT_SEED, output_path=None, chunk_size=DEFAULT_CHUNK_SIZE, fmt=None):
+    """
+    Streams a synthetic dataset to CSV or Parquet one chunk at a time, so memory
+    stays bounded by chunk_size regardless of the row count. Returns the output path.
+    """
+    check_sizes(rows, chunk_size)
+    if fmt is None:
+        fmt = "parquet" if output_path and output_path.endswith(".parquet") else "csv"
+    if fmt not in ["csv", "parquet"]:
+        raise ValueError(f"Unsupported output format: {fmt}")
+    output_path = output_path or default_output_path(fmt)
+
+    writer = None
+    written = 0
+    started = time.perf_counter()
+    try:
+        for chunk in iter_chunks(rows, seed, chunk_size):
+            if fmt == "csv":
+                chunk.to_csv(output_path, mode="w" if written == 0 else "a", header=written == 0, index=False)
+            else:
+                try:
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                except ImportError:
+                    raise ImportError("Parquet output requires pyarrow (pip install pyarrow).")
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+            written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Generated '{output_path}' with {written} rows and **16 features (scale only)** in {elapsed:.1f}s!")
+    return output_path
+
+
+def positive_int(text):
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {text}")
+    return value
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic hydration dataset.")
+    parser.add_argument("--rows", type=positive_int, default=DEFAULT_ROWS, help="Number of rows to generate.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Random seed; the output does not depend on --chunk-size.")
+    parser.add_argument("--output", type=str, default=None, help="Output path (.csv or .parquet). Defaults to maruf_<timestamp>_<suffix>.csv")
+    parser.add_argument("--chunk-size", type=positive_int, default=DEFAULT_CHUNK_SIZE, help="Rows generated and written per chunk.")
+    parser.add_argument("--format", type=str, choices=["csv", "parquet"], default=None, help="Output format (inferred from --output when omitted).")
+    args = parser.parse_args()
+
+    generate_dataset(rows=args.rows, seed=args.seed, output_path=args.output, chunk_size=args.chunk_size, fmt=args.format)
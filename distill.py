@@ -0,0 +1,197 @@
+"""
+Knowledge distillation of the hydration model into a compact student.
+
+The student is trained to reproduce the production (teacher) network's
+predictions on a dense sample of the input space: rows drawn from the same
+generator as the training data, plus rows drawn uniformly from the bounding box
+of every feature, so the student also matches the teacher on inputs that are
+rare in the data but reachable from the chat flow.
+
+The student is a plain Dense network saved as .h5, so HydrationService serves
+it with either backend (INFERENCE_BACKEND=keras or numpy); the teacher's scaler
+is reused unchanged and saved next to it.
+
+Example:
+    python distill.py --dataset maruf_20251128115103_0rzgk9.csv --units 16
+"""
+import argparse
+import time
+import uuid
+
+import joblib
+import numpy as np
+import tensorflow as tf
+from sklearn.model_selection import train_test_split
+
+from config import MODEL_PATH, SCALER_PATH
+from csv_data import generate_chunk
+from model_trainer import (
+    DEFAULT_DATASET_FILE, FEATURE_COLS, MODEL_FILENAME_PREFIX,
+    build_callbacks, build_model, load_dataset
+)
+from services.dense_model import DenseNetwork
+from services.model_io import load_keras_model
+
+DEFAULT_STUDENT_UNITS = (16,)
+DEFAULT_SAMPLES = 200_000
+DEFAULT_EPOCHS = 100
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_LEARNING_RATE = 0.003
+LATENCY_RUNS = 200
+
+# Columns sampled as integers in the uniform part of the transfer set
+INTEGER_COLS = [col for col in FEATURE_COLS if col not in ["pace", "intensity_score"]]
+
+
+def sample_inputs(samples, seed=42):
+    """Half generator rows, half uniform over each feature's [min, max]; returns unscaled X."""
+    rng = np.random.default_rng(seed)
+    realistic = generate_chunk(rng, samples - samples // 2)[FEATURE_COLS]
+
+    uniform = {}
+    for col in FEATURE_COLS:
+        low, high = realistic[col].min(), realistic[col].max()
+        if col in INTEGER_COLS:
+            uniform[col] = rng.integers(low, high + 1, size=samples // 2)
+        else:
+            uniform[col] = rng.uniform(low, high, size=samples // 2)
+
+    X = np.vstack([realistic.values, np.column_stack([uniform[col] for col in FEATURE_COLS])])
+    return X[rng.permutation(len(X))]
+
+
+def measure_latency(predict, X):
+    """Median single-row latency (ms) and total time for one predict over X (ms)."""
+    single = X[:1]
+    predict(single)
+    timings = []
+    for _ in range(LATENCY_RUNS):
+        started = time.perf_counter()
+        predict(single)
+        timings.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    predict(X)
+    return float(np.median(timings) * 1000.0), (time.perf_counter() - started) * 1000.0
+
+
+def report_row(name, model_path, X_test_scaled, y_test, teacher_pred):
+    keras_model = load_keras_model(model_path)
+    numpy_model = DenseNetwork.from_h5(model_path)
+    pred = numpy_model.predict(X_test_scaled)[:, 0]
+
+    keras_single, keras_batch = measure_latency(lambda X: keras_model.predict(X, verbose=0), X_test_scaled)
+    numpy_single, numpy_batch = measure_latency(numpy_model.predict, X_test_scaled)
+    return {
+        "name": name,
+        "params": keras_model.count_params(),
+        "mae_truth": float(np.mean(np.abs(pred - y_test))),
+        "mae_teacher": float(np.mean(np.abs(pred - teacher_pred))),
+        "keras_single_ms": keras_single,
+        "keras_batch_ms": keras_batch,
+        "numpy_single_ms": numpy_single,
+        "numpy_batch_ms": numpy_batch,
+    }
+
+
+def print_report(rows, test_rows):
+    print(f"\n✅ Distillation report ({test_rows} held-out rows, batch = one predict over all of them):")
+    print(f"  {'':<10}{'params':>10}{'MAE truth':>12}{'MAE teacher':>13}"
+          f"{'keras 1-row':>13}{'keras batch':>13}{'numpy 1-row':>13}{'numpy batch':>13}")
+    for row in rows:
+        print(f"  {row['name']:<10}{row['params']:>10}{row['mae_truth']:>9.2f} ml{row['mae_teacher']:>10.2f} ml"
+              f"{row['keras_single_ms']:>10.3f} ms{row['keras_batch_ms']:>10.1f} ms"
+              f"{row['numpy_single_ms']:>10.3f} ms{row['numpy_batch_ms']:>10.1f} ms")
+
+
+def distill(
+    dataset_file=DEFAULT_DATASET_FILE,
+    teacher_path=MODEL_PATH,
+    scaler_path=SCALER_PATH,
+    hidden_units=DEFAULT_STUDENT_UNITS,
+    samples=DEFAULT_SAMPLES,
+    epochs=DEFAULT_EPOCHS,
+    batch_size=DEFAULT_BATCH_SIZE,
+    learning_rate=DEFAULT_LEARNING_RATE,
+    seed=42,
+):
+    random_filename_model = MODEL_FILENAME_PREFIX + str(uuid.uuid4()) + ".h5"
+    random_filename_scaler = MODEL_FILENAME_PREFIX + str(uuid.uuid4()) + ".pkl"
+    tf.keras.utils.set_random_seed(seed)
+
+    teacher = DenseNetwork.from_h5(teacher_path)
+    scaler = joblib.load(scaler_path)
+    print(f"✅ Loaded teacher: {teacher_path}")
+
+    # -----------------------------
+    # Transfer set: teacher predictions over a dense input sample
+    # -----------------------------
+    X_transfer = scaler.transform(sample_inputs(samples, seed))
+    y_transfer = teacher.predict(X_transfer)[:, 0]
+    X_train, X_val, y_train, y_val = train_test_split(X_transfer, y_transfer, test_size=0.1, random_state=seed)
+    print(f"✅ Labelled {len(X_transfer)} sampled inputs with the teacher")
+
+    # -----------------------------
+    # Student
+    # -----------------------------
+    student = build_model(hidden_units=hidden_units, dropout=0, learning_rate=learning_rate)
+    early_stopping, checkpoint = build_callbacks(random_filename_model)
+    student.fit(
+        X_train, y_train,
+        epochs=epochs,
+        batch_size=batch_size,
+        validation_data=(X_val, y_val),
+        verbose=2,
+        callbacks=[early_stopping, checkpoint]
+    )
+    joblib.dump(scaler, random_filename_scaler)
+
+    # -----------------------------
+    # Report on the same held-out split model_trainer evaluates on
+    # -----------------------------
+    X, y = load_dataset(dataset_file)
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_test_scaled = scaler.transform(X_test).astype(np.float32)
+    teacher_pred = teacher.predict(X_test_scaled)[:, 0]
+
+    rows = [
+        report_row("teacher", teacher_path, X_test_scaled, y_test, teacher_pred),
+        report_row("student", random_filename_model, X_test_scaled, y_test, teacher_pred),
+    ]
+    print_report(rows, len(X_test))
+
+    print(f"\n✅ Student model saved to: {random_filename_model}")
+    print(f"✅ Scaler saved to: {random_filename_scaler}")
+
+    print("\n⚠️  IMPORTANT: Please update 'config.py' with these new filenames to serve the student!")
+    return rows
+
+
+def parse_units(text):
+    return tuple(int(u) for u in text.split(",") if u)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distill the hydration model into a smaller student network.")
+    parser.add_argument("--dataset", type=str, default=DEFAULT_DATASET_FILE, help="Labelled CSV used for the held-out report.")
+    parser.add_argument("--teacher", type=str, default=MODEL_PATH, help="Teacher model (.h5).")
+    parser.add_argument("--scaler", type=str, default=SCALER_PATH, help="Scaler that belongs to the teacher.")
+    parser.add_argument("--units", type=parse_units, default=DEFAULT_STUDENT_UNITS, help="Student hidden layer widths, e.g. 16 or 32,16")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="Inputs in the transfer set.")
+    parser.add_argument("--epochs", type=int, default=DEFAULT_EPOCHS, help="Maximum epochs (early stopping applies).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Training batch size.")
+    parser.add_argument("--learning-rate", type=float, default=DEFAULT_LEARNING_RATE, help="Adam learning rate.")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for sampling and initialization.")
+    args = parser.parse_args()
+
+    distill(
+        dataset_file=args.dataset,
+        teacher_path=args.teacher,
+        scaler_path=args.scaler,
+        hidden_units=args.units,
+        samples=args.samples,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        learning_rate=args.learning_rate,
+        seed=args.seed,
+    )
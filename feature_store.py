@@ -0,0 +1,189 @@
+"""
+Preprocessed feature store for training datasets.
+
+Converts a raw training CSV into validated, typed, one-file-per-column .npy
+arrays plus a schema.json, stored under FEATURE_CACHE_DIR/<sha256 of the CSV>/.
+Training code then memory-maps the arrays instead of re-parsing the CSV.
+
+Run with:  python feature_store.py --dataset maruf_20251128115103_0rzgk9.csv
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import FEATURE_CACHE_DIR
+
+SCHEMA_FILENAME = "schema.json"
+INDEX_FILENAME = "index.json"
+SCHEMA_VERSION = 1
+DEFAULT_CHUNK_SIZE = 500_000
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILENAME), "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def source_key(dataset_file, cache_dir=FEATURE_CACHE_DIR):
+    """
+    Content hash of the CSV. The index remembers (size, mtime) per path so an
+    unchanged file isn't re-hashed on every training run.
+    """
+    path = os.path.abspath(dataset_file)
+    stat = os.stat(path)
+    entry = _load_index(cache_dir).get(path)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+    return file_sha256(path)
+
+
+def _remember_source(dataset_file, sha256, cache_dir):
+    path = os.path.abspath(dataset_file)
+    stat = os.stat(path)
+    index = _load_index(cache_dir)
+    index[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+    tmp_path = os.path.join(cache_dir, INDEX_FILENAME + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=4)
+    os.replace(tmp_path, os.path.join(cache_dir, INDEX_FILENAME))
+
+
+def count_rows(dataset_file):
+    with open(dataset_file, "rb") as f:
+        next(f, None)  # header
+        return sum(1 for line in f if line.strip())
+
+
+def _column_dtype(series):
+    return np.dtype("int32") if pd.api.types.is_integer_dtype(series) else np.dtype("float64")
+
+
+def _validated(series, dtype, column, row_offset):
+    values = series.to_numpy(dtype="float64")
+    bad = np.flatnonzero(~np.isfinite(values))
+    if len(bad):
+        raise ValueError(f"Column '{column}' has a missing/non-numeric value at data row {row_offset + bad[0] + 1}")
+    if dtype.kind == "i":
+        bad = np.flatnonzero(values != np.round(values))
+        if len(bad):
+            raise ValueError(f"Column '{column}' expected integers, got {values[bad[0]]} at data row {row_offset + bad[0] + 1}")
+    return values.astype(dtype)
+
+
+def build_feature_store(dataset_file, feature_cols, target_col, cache_dir=FEATURE_CACHE_DIR, chunk_size=DEFAULT_CHUNK_SIZE, force=False):
+    """Parses and validates the CSV once, writing one memory-mappable .npy per column. Returns the store dir."""
+    if not os.path.exists(dataset_file):
+        raise FileNotFoundError(f"CSV file not found: {dataset_file}. Please check the filename.")
+    os.makedirs(cache_dir, exist_ok=True)
+
+    columns = feature_cols + [target_col]
+    header = pd.read_csv(dataset_file, nrows=0).columns
+    missing = set(columns) - set(header)
+    if missing:
+        raise ValueError(f"Missing columns in CSV: {missing}")
+
+    started = time.perf_counter()
+    sha256 = file_sha256(dataset_file)
+    store_dir = os.path.join(cache_dir, sha256)
+    if os.path.exists(os.path.join(store_dir, SCHEMA_FILENAME)) and not force:
+        _remember_source(dataset_file, sha256, cache_dir)
+        print(f"✅ Feature store already up to date: {store_dir}")
+        return store_dir
+
+    rows = count_rows(dataset_file)
+    tmp_dir = store_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    arrays = {}
+    written = 0
+    for chunk in pd.read_csv(dataset_file, usecols=columns, chunksize=chunk_size):
+        if not arrays:
+            for column in columns:
+                arrays[column] = np.lib.format.open_memmap(
+                    os.path.join(tmp_dir, f"{column}.npy"), mode="w+", dtype=_column_dtype(chunk[column]), shape=(rows,)
+                )
+        if written + len(chunk) > rows:
+            raise ValueError("CSV has more rows than expected while building the feature store.")
+        for column in columns:
+            arrays[column][written:written + len(chunk)] = _validated(chunk[column], arrays[column].dtype, column, written)
+        written += len(chunk)
+
+    if written != rows:
+        raise ValueError(f"Parsed {written} rows but counted {rows}; the CSV may contain blank or malformed lines.")
+    for array in arrays.values():
+        array.flush()
+
+    schema = {
+        "version": SCHEMA_VERSION,
+        "source": os.path.abspath(dataset_file),
+        "sha256": sha256,
+        "rows": rows,
+        "feature_cols": feature_cols,
+        "target_col": target_col,
+        "dtypes": {column: arrays[column].dtype.str for column in columns},
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    del arrays
+    with open(os.path.join(tmp_dir, SCHEMA_FILENAME), "w") as f:
+        json.dump(schema, f, indent=4)
+
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(tmp_dir, store_dir)
+    _remember_source(dataset_file, sha256, cache_dir)
+
+    print(f"✅ Built feature store for {rows} rows in {time.perf_counter() - started:.1f}s: {store_dir}")
+    return store_dir
+
+
+def load_feature_store(dataset_file, feature_cols, target_col, cache_dir=FEATURE_CACHE_DIR):
+    """Returns {column: read-only memmap} for the CSV's cached store, or None if there is no valid cache."""
+    if not os.path.isdir(cache_dir) or not os.path.exists(dataset_file):
+        return None
+
+    store_dir = os.path.join(cache_dir, source_key(dataset_file, cache_dir))
+    try:
+        with open(os.path.join(store_dir, SCHEMA_FILENAME), "r") as f:
+            schema = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if schema.get("version") != SCHEMA_VERSION or schema["feature_cols"] != feature_cols or schema["target_col"] != target_col:
+        print(f"⚠️  Ignoring feature store with a different schema: {store_dir}")
+        return None
+
+    return {
+        column: np.load(os.path.join(store_dir, f"{column}.npy"), mmap_mode="r")
+        for column in feature_cols + [target_col]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the memory-mapped feature store for a training CSV.")
+    parser.add_argument("--dataset", type=str, required=True, help="Path to the CSV dataset file.")
+    parser.add_argument("--cache-dir", type=str, default=FEATURE_CACHE_DIR, help="Feature store root directory.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows parsed per chunk.")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if a store for this content already exists.")
+    args = parser.parse_args()
+
+    from model_trainer import FEATURE_COLS, TARGET_COL
+    build_feature_store(args.dataset, FEATURE_COLS, TARGET_COL, cache_dir=args.cache_dir, chunk_size=args.chunk_size, force=args.force)
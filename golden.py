@@ -0,0 +1,249 @@
+"""
+Golden-prediction regression harness for HydrationService.predict_intake.
+
+"record" runs a fixed corpus of profiles through predict_intake and saves the
+outputs as the golden file. "check" replays the golden inputs through the
+current inference path (any INFERENCE_BACKEND, or another model file) and fails
+if an output moved outside the tolerances. Both modes report per-profile latency.
+
+The corpus crosses every activity level/sub-activity, complication type,
+humidity_scale and environment flag; age/gender/weight and temperature are
+drawn from fixed variants with a fixed seed so their branches are covered too.
+
+Examples:
+    python golden.py --mode record
+    python golden.py --mode check --backend numpy
+    python golden.py --mode check --backend quantized --tolerance-ml 10
+    python golden.py --mode check --model new_model.h5 --scaler new_scaler.pkl
+"""
+import argparse
+import csv
+import datetime
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# config (and with it INFERENCE_BACKEND) is imported only after --backend is applied
+DEFAULT_GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden_predictions.json")
+GOLDEN_FORMAT_VERSION = 1
+CORPUS_SEED = 7
+
+DEFAULT_TOLERANCE_ML = 1.0
+DEFAULT_TOLERANCE_REL = 0.0
+DEFAULT_TOLERANCE_INTENSITY = 1e-6
+EXACT_TOLERANCE = 1e-9
+
+# Appended to COMPLICATION_MAP's keys to exercise the keyword fallback (kidney/heart/... -> severe)
+FREE_TEXT_COMPLICATIONS = ["kidney disease"]
+HUMIDITY_SCALES = ["1", "2", "3", "4", "5"]
+ENVIRONMENT_FLAGS = {
+    "is_indoors": ["indoors", "outdoors"],
+    "is_ground_wet": ["no", "yes"],
+    "is_windy_or_fanned": ["no", "yes"],
+    "is_direct_sun": ["no", "yes"],
+}
+# Hit the age/weight/gender adjustments in map_activity_level_to_details
+BIOMETRICS = [
+    {"age": "30", "gender": "male", "weight": "70"},
+    {"age": "22", "gender": "female", "weight": "55"},
+    {"age": "60", "gender": "female", "weight": "62"},
+    {"age": "41", "gender": "male", "weight": "95"},
+]
+TEMPERATURES = ["18", "26", "33", "38"]
+
+
+def build_corpus(seed=CORPUS_SEED):
+    from config import ACTIVITY_MAP, COMPLICATION_MAP, SUB_ACTIVITY_OPTIONS
+
+    rng = random.Random(seed)
+    complications = list(COMPLICATION_MAP) + FREE_TEXT_COMPLICATIONS
+    corpus = []
+    for activity in ACTIVITY_MAP:
+        for sub_activity, complication, humidity_scale, flags in itertools.product(
+            SUB_ACTIVITY_OPTIONS[ACTIVITY_MAP[activity]], complications, HUMIDITY_SCALES, itertools.product(*ENVIRONMENT_FLAGS.values())
+        ):
+            profile = dict(rng.choice(BIOMETRICS))
+            profile.update({
+                "activity": activity,
+                "sub_activity": sub_activity,
+                "humidity_scale": humidity_scale,
+                "temperature": rng.choice(TEMPERATURES),
+                "complication": complication,
+            })
+            profile.update(zip(ENVIRONMENT_FLAGS, flags))
+            corpus.append(profile)
+    return corpus
+
+
+def snapshot(service, result):
+    """predict_intake output plus the goal message derived from it, as plain JSON types."""
+    output = json.loads(json.dumps(result, default=float))
+    output["goal_message"] = service.goal_message(result["complication"], result["intensity_score"])
+    return output
+
+
+def run_corpus(service, inputs, repeat=1):
+    """Returns (outputs, latencies_ms); latency is the median of `repeat` calls per profile."""
+    outputs, latencies = [], []
+    for data in inputs:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = service.predict_intake(dict(data))
+            timings.append((time.perf_counter() - started) * 1000.0)
+        outputs.append(snapshot(service, result))
+        latencies.append(float(np.median(timings)))
+    return outputs, latencies
+
+
+def flatten(value, prefix=""):
+    if isinstance(value, dict):
+        items = {}
+        for key, inner in value.items():
+            items.update(flatten(inner, f"{prefix}{key}."))
+        return items
+    return {prefix.rstrip("."): value}
+
+
+def compare(expected, actual, tolerance_ml, tolerance_rel, tolerance_intensity):
+    """Returns a list of (field, expected, actual) that are outside tolerance."""
+    expected, actual = flatten(expected), flatten(actual)
+    problems = []
+    for field in sorted(set(expected) | set(actual)):
+        want, got = expected.get(field), actual.get(field)
+        if isinstance(want, (int, float)) and isinstance(got, (int, float)):
+            if field == "predicted_intake":
+                allowed = max(tolerance_ml, tolerance_rel * abs(want))
+            elif field == "intensity_score":
+                allowed = tolerance_intensity
+            else:
+                allowed = EXACT_TOLERANCE
+            if abs(got - want) > allowed:
+                problems.append((field, want, got))
+        elif want != got:
+            problems.append((field, want, got))
+    return problems
+
+
+def write_golden(path, meta, records):
+    # One record per line keeps diffs of the golden file readable
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"meta": ' + json.dumps(meta) + ',\n"records": [\n')
+        f.write(",\n".join(json.dumps(record) for record in records))
+        f.write("\n]}\n")
+
+
+def print_latency(inputs, latencies, slowest=5, output_path=None):
+    latencies = np.asarray(latencies)
+    print(f"\n⏱️  predict_intake latency over {len(latencies)} profiles: "
+          f"p50 {np.percentile(latencies, 50):.3f} ms, p95 {np.percentile(latencies, 95):.3f} ms, "
+          f"p99 {np.percentile(latencies, 99):.3f} ms, max {latencies.max():.3f} ms")
+    for index in np.argsort(latencies)[::-1][:slowest]:
+        data = inputs[index]
+        print(f"  #{index}: {latencies[index]:.3f} ms ({data['activity']}/{data['sub_activity']}, "
+              f"complication={data['complication']}, humidity_scale={data['humidity_scale']})")
+
+    if output_path:
+        with open(output_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "latency_ms"] + list(inputs[0]))
+            for index, (data, latency) in enumerate(zip(inputs, latencies)):
+                writer.writerow([index, f"{latency:.4f}"] + list(data.values()))
+        print(f"✅ Per-profile latency saved to: {output_path}")
+
+
+def record(service, golden_path, repeat, latency_output):
+    from config import INFERENCE_BACKEND
+
+    inputs = build_corpus()
+    outputs, latencies = run_corpus(service, inputs, repeat)
+    meta = {
+        "version": GOLDEN_FORMAT_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "backend": INFERENCE_BACKEND,
+        "profiles": len(inputs),
+    }
+    write_golden(golden_path, meta, [{"id": i, "input": d, "output": o} for i, (d, o) in enumerate(zip(inputs, outputs))])
+    print(f"✅ Recorded {len(inputs)} golden predictions to: {golden_path}")
+    print_latency(inputs, latencies, output_path=latency_output)
+
+
+def check(service, golden_path, repeat, latency_output, tolerance_ml, tolerance_rel, tolerance_intensity, show=20):
+    with open(golden_path, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+    if golden["meta"].get("version") != GOLDEN_FORMAT_VERSION:
+        raise ValueError(f"Unsupported golden file version: {golden['meta'].get('version')}")
+
+    records = golden["records"]
+    inputs = [record["input"] for record in records]
+    outputs, latencies = run_corpus(service, inputs, repeat)
+
+    failures = []
+    drift = []
+    for record, output in zip(records, outputs):
+        drift.append(abs(output["predicted_intake"] - record["output"]["predicted_intake"]))
+        problems = compare(record["output"], output, tolerance_ml, tolerance_rel, tolerance_intensity)
+        if problems:
+            failures.append((record["id"], problems))
+
+    print(f"\n🔎 Checked {len(records)} profiles against {golden_path} "
+          f"(recorded {golden['meta'].get('created')} with backend={golden['meta'].get('backend')})")
+    print(f"  predicted_intake drift: mean {np.mean(drift):.3f} ml, max {np.max(drift):.3f} ml "
+          f"(tolerance {tolerance_ml} ml / {tolerance_rel:.2%})")
+    print_latency(inputs, latencies, output_path=latency_output)
+
+    if failures:
+        print(f"\n❌ {len(failures)} of {len(records)} profiles drifted outside tolerance:")
+        for record_id, problems in failures[:show]:
+            details = "; ".join(f"{field}: {want!r} -> {got!r}" for field, want, got in problems)
+            print(f"  #{record_id}: {details}")
+        return False
+
+    print(f"\n✅ All {len(records)} profiles match the golden file.")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record or check golden predict_intake outputs.")
+    parser.add_argument("--mode", type=str, choices=["record", "check"], default="check", help="'record' writes the golden file; 'check' compares against it.")
+    parser.add_argument("--golden", type=str, default=DEFAULT_GOLDEN_PATH, help="Golden file path.")
+    parser.add_argument("--backend", type=str, choices=["keras", "numpy", "quantized"], default=None, help="Inference backend (default: INFERENCE_BACKEND).")
+    parser.add_argument("--model", type=str, default=None, help="Serve this .h5 instead of MODEL_PATH.")
+    parser.add_argument("--scaler", type=str, default=None, help="Serve this scaler instead of SCALER_PATH.")
+    parser.add_argument("--quantized-model", type=str, default=None, help="Serve this .npz instead of QUANTIZED_MODEL_PATH.")
+    parser.add_argument("--repeat", type=int, default=1, help="Calls per profile; latency is their median.")
+    parser.add_argument("--tolerance-ml", type=float, default=DEFAULT_TOLERANCE_ML, help="Allowed predicted_intake drift in ml.")
+    parser.add_argument("--tolerance-rel", type=float, default=DEFAULT_TOLERANCE_REL, help="Allowed predicted_intake drift as a fraction (the larger of the two applies).")
+    parser.add_argument("--tolerance-intensity", type=float, default=DEFAULT_TOLERANCE_INTENSITY, help="Allowed intensity_score drift.")
+    parser.add_argument("--latency-output", type=str, default=None, help="Write per-profile latency to this CSV.")
+    args = parser.parse_args()
+
+    # The backend is read when the service module is imported
+    if args.backend:
+        os.environ["INFERENCE_BACKEND"] = args.backend
+    from services.hydration_service import hydration_service
+
+    if args.model or args.scaler or args.quantized_model:
+        from config import MODEL_PATH, SCALER_PATH, QUANTIZED_MODEL_PATH
+        hydration_service.load_assets(
+            model_path=args.model or MODEL_PATH,
+            scaler_path=args.scaler or SCALER_PATH,
+            quantized_model_path=args.quantized_model or QUANTIZED_MODEL_PATH,
+        )
+        hydration_service.warm_up()
+    if not hydration_service.ready:
+        raise SystemExit("❌ HydrationService is not ready; refusing to record or check with the fallback prediction.")
+
+    if args.mode == "record":
+        record(hydration_service, args.golden, args.repeat, args.latency_output)
+    else:
+        ok = check(
+            hydration_service, args.golden, args.repeat, args.latency_output,
+            args.tolerance_ml, args.tolerance_rel, args.tolerance_intensity,
+        )
+        sys.exit(0 if ok else 1)
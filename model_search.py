@@ -0,0 +1,236 @@
+"""
+Parallel hyperparameter search for the hydration model.
+
+Runs a grid (or a random sample of it) over layer widths, dropout, learning rate
+and batch size. Each config is scored with k-fold cross-validation, and configs
+are spread across a process pool whose workers each get a fixed TensorFlow
+thread budget. Writes a leaderboard (CSV + JSON) with MAE/MSE, training time,
+parameter count and inference latency.
+
+Example:
+    python model_search.py --dataset data.csv --units 256,128,64,32 128,64 64 \\
+        --dropout 0 0.2 --learning-rate 0.001 0.0003 --batch-size 32 128 \\
+        --folds 5 --workers 4 --samples 12
+"""
+import argparse
+import datetime
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from model_trainer import DEFAULT_DATASET_FILE, FEATURE_COLS, TARGET_COL, DEFAULT_HIDDEN_UNITS, DEFAULT_DROPOUT, load_dataset
+
+DEFAULT_FOLDS = 5
+DEFAULT_EPOCHS = 100
+DEFAULT_PATIENCE = 10
+LATENCY_RUNS = 50
+
+# Per-worker state, filled by init_worker
+_worker_data = {}
+
+
+def init_worker(dataset_file, threads):
+    """Limits TensorFlow to `threads` threads in this worker and loads the dataset once."""
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    X, y = load_dataset(dataset_file)
+    _worker_data["X"] = X.astype(np.float32)
+    _worker_data["y"] = y.astype(np.float32)
+
+
+def measure_latency(model, X):
+    """Median single-row and per-row batch inference latency in milliseconds."""
+    single = X[:1]
+    model(single, training=False)
+    timings = []
+    for _ in range(LATENCY_RUNS):
+        started = time.perf_counter()
+        model(single, training=False)
+        timings.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    model.predict(X, batch_size=1024, verbose=0)
+    batch_seconds = time.perf_counter() - started
+    return float(np.median(timings) * 1000.0), batch_seconds * 1000.0 / len(X)
+
+
+def evaluate_config(config, folds, epochs, patience, seed):
+    """Trains one config on every fold; runs inside a pool worker."""
+    import tensorflow as tf
+    from sklearn.model_selection import KFold
+    from sklearn.preprocessing import StandardScaler
+    from model_trainer import build_model
+
+    X, y = _worker_data["X"], _worker_data["y"]
+    fold_mae, fold_mse, fold_seconds, fold_epochs = [], [], [], []
+    latency_single_ms = latency_batch_ms_per_row = None
+    param_count = None
+
+    for fold, (train_idx, val_idx) in enumerate(KFold(n_splits=folds, shuffle=True, random_state=seed).split(X)):
+        tf.keras.utils.set_random_seed(seed + fold)
+        scaler = StandardScaler()
+        X_train = scaler.fit_transform(X[train_idx])
+        X_val = scaler.transform(X[val_idx])
+
+        model = build_model(
+            hidden_units=config["hidden_units"],
+            dropout=config["dropout"],
+            learning_rate=config["learning_rate"],
+            summary=False,
+        )
+        early_stopping = tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=patience, restore_best_weights=True)
+
+        started = time.perf_counter()
+        history = model.fit(
+            X_train, y[train_idx],
+            epochs=epochs,
+            batch_size=config["batch_size"],
+            validation_data=(X_val, y[val_idx]),
+            verbose=0,
+            callbacks=[early_stopping],
+        )
+        fold_seconds.append(time.perf_counter() - started)
+        fold_epochs.append(len(history.history["loss"]))
+
+        mse, mae = model.evaluate(X_val, y[val_idx], verbose=0)
+        fold_mae.append(mae)
+        fold_mse.append(mse)
+
+        if fold == 0:
+            param_count = model.count_params()
+            latency_single_ms, latency_batch_ms_per_row = measure_latency(model, X_val.astype(np.float32))
+
+        tf.keras.backend.clear_session()
+
+    return {
+        "hidden_units": "-".join(str(u) for u in config["hidden_units"]),
+        "dropout": config["dropout"],
+        "learning_rate": config["learning_rate"],
+        "batch_size": config["batch_size"],
+        "mae_mean": float(np.mean(fold_mae)),
+        "mae_std": float(np.std(fold_mae)),
+        "mse_mean": float(np.mean(fold_mse)),
+        "mse_std": float(np.std(fold_mse)),
+        "train_seconds_mean": float(np.mean(fold_seconds)),
+        "epochs_mean": float(np.mean(fold_epochs)),
+        "param_count": param_count,
+        "latency_single_ms": latency_single_ms,
+        "latency_batch_ms_per_row": latency_batch_ms_per_row,
+    }
+
+
+def build_configs(units_options, dropout_options, lr_options, batch_options, samples=None, seed=42):
+    grid = [
+        {"hidden_units": units, "dropout": dropout, "learning_rate": lr, "batch_size": batch}
+        for units, dropout, lr, batch in itertools.product(units_options, dropout_options, lr_options, batch_options)
+    ]
+    if samples and samples < len(grid):
+        grid = random.Random(seed).sample(grid, samples)
+    return grid
+
+
+def run_search(
+    dataset_file=DEFAULT_DATASET_FILE,
+    configs=None,
+    folds=DEFAULT_FOLDS,
+    epochs=DEFAULT_EPOCHS,
+    patience=DEFAULT_PATIENCE,
+    workers=None,
+    threads_per_worker=None,
+    seed=42,
+    output_path=None,
+):
+    if not os.path.exists(dataset_file):
+        raise FileNotFoundError(f"CSV file not found: {dataset_file}. Please check the filename.")
+    header = pd.read_csv(dataset_file, nrows=0).columns
+    missing = set(FEATURE_COLS + [TARGET_COL]) - set(header)
+    if missing:
+        raise ValueError(f"Missing columns in CSV: {missing}")
+
+    configs = configs or build_configs([DEFAULT_HIDDEN_UNITS], [DEFAULT_DROPOUT], [0.001], [32])
+    cpu_count = os.cpu_count() or 1
+    workers = workers or min(len(configs), cpu_count)
+    threads_per_worker = threads_per_worker or max(1, cpu_count // workers)
+    output_path = output_path or f"search_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.csv"
+
+    print(f"🔎 Evaluating {len(configs)} configs x {folds} folds on {workers} workers ({threads_per_worker} TF threads each)")
+
+    results = []
+    started = time.perf_counter()
+    # spawn: TensorFlow is not fork-safe, and each worker must set its thread limits before TF starts
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(dataset_file, threads_per_worker),
+    ) as pool:
+        futures = {pool.submit(evaluate_config, config, folds, epochs, patience, seed): config for config in configs}
+        for future in as_completed(futures):
+            config = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ Config {config} failed: {e}")
+                continue
+            results.append(result)
+            print(f"  [{len(results)}/{len(configs)}] {result['hidden_units']} dropout={result['dropout']} "
+                  f"lr={result['learning_rate']} batch={result['batch_size']} -> MAE {result['mae_mean']:.2f} ml")
+
+    if not results:
+        print("❌ No config finished successfully; no leaderboard written.")
+        return None
+
+    leaderboard = pd.DataFrame(results).sort_values("mae_mean").reset_index(drop=True)
+    leaderboard.index += 1
+    leaderboard.to_csv(output_path, index_label="rank")
+    with open(os.path.splitext(output_path)[0] + ".json", "w") as f:
+        json.dump(leaderboard.to_dict(orient="records"), f, indent=4)
+
+    print(f"\n✅ Search finished in {time.perf_counter() - started:.1f}s")
+    print(leaderboard.to_string())
+    print(f"\n✅ Leaderboard saved to: {output_path}")
+    return leaderboard
+
+
+def parse_units(text):
+    return tuple(int(u) for u in text.split(",") if u)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter search with k-fold cross-validation.")
+    parser.add_argument("--dataset", type=str, default=DEFAULT_DATASET_FILE, help="Path to the CSV dataset file.")
+    parser.add_argument("--units", type=parse_units, nargs="+", default=[DEFAULT_HIDDEN_UNITS], help="Hidden layer widths, e.g. 256,128,64,32 128,64")
+    parser.add_argument("--dropout", type=float, nargs="+", default=[DEFAULT_DROPOUT], help="Dropout rates after the first layer.")
+    parser.add_argument("--learning-rate", type=float, nargs="+", default=[0.001], help="Adam learning rates.")
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[32], help="Batch sizes.")
+    parser.add_argument("--samples", type=int, default=None, help="Randomly sample this many configs from the grid.")
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS, help="Number of cross-validation folds.")
+    parser.add_argument("--epochs", type=int, default=DEFAULT_EPOCHS, help="Maximum epochs per fold (early stopping applies).")
+    parser.add_argument("--patience", type=int, default=DEFAULT_PATIENCE, help="Early stopping patience.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: min(configs, CPU cores)).")
+    parser.add_argument("--threads-per-worker", type=int, default=None, help="TensorFlow intra-op threads per worker.")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for fold splits and config sampling.")
+    parser.add_argument("--output", type=str, default=None, help="Leaderboard CSV path (a .json copy is written next to it).")
+    args = parser.parse_args()
+
+    configs = build_configs(args.units, args.dropout, args.learning_rate, args.batch_size, args.samples, args.seed)
+    run_search(
+        dataset_file=args.dataset,
+        configs=configs,
+        folds=args.folds,
+        epochs=args.epochs,
+        patience=args.patience,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        seed=args.seed,
+        output_path=args.output,
+    )
@@ -1,3 +1,6 @@
+import csv
+import io
+import numpy as np
 import pandas as pd
 import tensorflow as tf
 from sklearn.model_selection import train_test_split
@@ -6,12 +9,66 @@ import joblib
 import os
 import uuid
 import argparse
+import json
+import subprocess
+import sys
+import time
+
+from config import MODEL_PATH, SCALER_PATH
+from services.dense_model import DenseNetwork, QUANTIZED_DTYPES
+from services.model_io import load_keras_model
+from feature_store import load_feature_store
 
 # -----------------------------
 # Configuration
 # -----------------------------
 MODEL_FILENAME_PREFIX = "maruf_"
 DEFAULT_DATASET_FILE = "maruf_20251128115103_0rzgk9.csv"
+TARGET_COL = "water_intake"
+
+# Streaming mode: every VALIDATION_EVERY-th row is held out (a deterministic 80/20 split)
+VALIDATION_EVERY = 5
+DEFAULT_CHUNK_SIZE = 100_000
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_SHUFFLE_BUFFER = 50_000
+DEFAULT_EPOCHS = 300
+
+# Fine-tune mode: warm start from the production model on new rows only.
+# Every trained model gets a <model>.trained.json with the rows / byte offset of the CSV it was trained through.
+TRAINING_STATE_SUFFIX = ".trained.json"
+DEFAULT_FINETUNE_LEARNING_RATE = 1e-4
+DEFAULT_FINETUNE_EPOCHS = 20
+
+# Quantize mode: export is rejected if any held-out prediction moves more than this from float32
+DEFAULT_QUANTIZE_MAX_ERROR_ML = 25.0
+
+# Loads one model format in a fresh interpreter and reports load time and peak RSS
+# (VmHWM; ru_maxrss would include the forking parent's peak)
+LOAD_PROBE = """
+import json, resource, sys, time
+kind, model_path, scaler_path = sys.argv[1:4]
+started = time.perf_counter()
+if kind == "quantized":
+    from services.dense_model import DenseNetwork
+    model, scaler = DenseNetwork.from_quantized(model_path)
+else:
+    import joblib
+    scaler = joblib.load(scaler_path)
+    if kind == "numpy":
+        from services.dense_model import DenseNetwork
+        model = DenseNetwork.from_h5(model_path)
+    else:
+        from services.model_io import load_keras_model
+        model = load_keras_model(model_path)
+load_ms = (time.perf_counter() - started) * 1000.0
+model.predict(scaler.transform([[0.0] * scaler.n_features_in_]))
+try:
+    with open("/proc/self/status") as f:
+        rss_mb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:")) / 1024.0
+except OSError:
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+print(json.dumps({"load_ms": load_ms, "rss_mb": rss_mb}))
+"""
 
 # Features must match CSV exactly
 # CRITICAL: REMOVE "humidity" from the list (using humidity_scale)
@@ -36,13 +93,52 @@ FEATURE_COLS = [
 
 INPUT_DIMENSION = len(FEATURE_COLS)
 
-def train_model(dataset_file=DEFAULT_DATASET_FILE):
-    random_filename_model = MODEL_FILENAME_PREFIX + str(uuid.uuid4()) + ".h5"
-    random_filename_scaler = MODEL_FILENAME_PREFIX + str(uuid.uuid4()) + ".pkl"
+DEFAULT_HIDDEN_UNITS = (256, 128, 64, 32)
+DEFAULT_DROPOUT = 0.2
+
+def build_model(hidden_units=DEFAULT_HIDDEN_UNITS, dropout=DEFAULT_DROPOUT, learning_rate=None, summary=True):
+    layers = [tf.keras.layers.Dense(hidden_units[0], activation="relu", input_shape=(INPUT_DIMENSION,))]
+    if dropout:
+        layers.append(tf.keras.layers.Dropout(dropout)) # Added Dropout for regularization
+    for units in hidden_units[1:]:
+        layers.append(tf.keras.layers.Dense(units, activation="relu"))
+    layers.append(tf.keras.layers.Dense(1, activation="relu"))
+    model = tf.keras.Sequential(layers)
+
+    optimizer = "adam" if learning_rate is None else tf.keras.optimizers.Adam(learning_rate=learning_rate)
+    model.compile(optimizer=optimizer, loss="mse", metrics=["mae"])
+    if summary:
+        model.summary()
+    return model
+
+def build_callbacks(model_path):
+    early_stopping = tf.keras.callbacks.EarlyStopping(
+        monitor='val_loss', 
+        patience=20, 
+        restore_best_weights=True,
+        verbose=1
+    )
     
-    # -----------------------------
-    # Load dataset
-    # -----------------------------
+    # We save the BEST model only
+    checkpoint = tf.keras.callbacks.ModelCheckpoint(
+        model_path, 
+        monitor='val_loss', 
+        save_best_only=True,
+        verbose=1
+    )
+    return early_stopping, checkpoint
+
+def load_dataset(dataset_file, use_cache=True):
+    """Returns (X, y), memory-mapped from the feature store when one exists for this CSV's content."""
+    store = load_feature_store(dataset_file, FEATURE_COLS, TARGET_COL) if use_cache else None
+    if store is not None:
+        print(f"✅ Loaded dataset from feature store: {dataset_file}")
+        # One float64 copy, filled column by column straight from the memory-mapped columns
+        X = np.empty((len(store[TARGET_COL]), len(FEATURE_COLS)), dtype=np.float64)
+        for i, col in enumerate(FEATURE_COLS):
+            X[:, i] = store[col]
+        return X, np.asarray(store[TARGET_COL], dtype=np.float64)
+
     if not os.path.exists(dataset_file):
         raise FileNotFoundError(f"CSV file not found: {dataset_file}. Please check the filename.")
 
@@ -54,8 +150,16 @@ def train_model(dataset_file=DEFAULT_DATASET_FILE):
     if missing:
         raise ValueError(f"Missing columns in CSV: {missing}")
 
-    X = df[FEATURE_COLS].values
-    y = df["water_intake"].values
+    return df[FEATURE_COLS].values, df[TARGET_COL].values
+
+def train_model(dataset_file=DEFAULT_DATASET_FILE, use_cache=True):
+    random_filename_model = MODEL_FILENAME_PREFIX + str(uuid.uuid4()) + ".h5"
+    random_filename_scaler = MODEL_FILENAME_PREFIX + str(uuid.uuid4()) + ".pkl"
+    
+    # -----------------------------
+    # Load dataset
+    # -----------------------------
+    X, y = load_dataset(dataset_file, use_cache)
 
     # -----------------------------
     # Train/Test split
@@ -74,36 +178,12 @@ def train_model(dataset_file=DEFAULT_DATASET_FILE):
     # -----------------------------
     # Model definition
     # -----------------------------
-    model = tf.keras.Sequential([
-        tf.keras.layers.Dense(256, activation="relu", input_shape=(INPUT_DIMENSION,)),
-        tf.keras.layers.Dropout(0.2), # Added Dropout for regularization
-        tf.keras.layers.Dense(128, activation="relu"),
-        tf.keras.layers.Dense(64, activation="relu"),
-        tf.keras.layers.Dense(32, activation="relu"),
-        tf.keras.layers.Dense(1, activation="relu") 
-    ])
-
-    model.compile(optimizer="adam", loss="mse", metrics=["mae"])
-    model.summary()
+    model = build_model()
 
     # -----------------------------
     # Training
     # -----------------------------
-    # Callbacks
-    early_stopping = tf.keras.callbacks.EarlyStopping(
-        monitor='val_loss', 
-        patience=20, 
-        restore_best_weights=True,
-        verbose=1
-    )
-    
-    # We save the BEST model only
-    checkpoint = tf.keras.callbacks.ModelCheckpoint(
-        random_filename_model, 
-        monitor='val_loss', 
-        save_best_only=True,
-        verbose=1
-    )
+    early_stopping, checkpoint = build_callbacks(random_filename_model)
 
     history = model.fit(
         X_train_scaled, y_train,
@@ -118,7 +198,7 @@ def train_model(dataset_file=DEFAULT_DATASET_FILE):
     # Evaluation
     # -----------------------------
     # Load best model for evaluation (Checkpoint saves it)
-    best_model = tf.keras.models.load_model(random_filename_model)
+    best_model = load_keras_model(random_filename_model)
     loss, mae = best_model.evaluate(X_test_scaled, y_test, verbose=0)
     
     print(f"\n✅ Model Evaluation (Best Model):")
@@ -129,15 +209,384 @@ def train_model(dataset_file=DEFAULT_DATASET_FILE):
     # Save Scaler
     # -----------------------------
     joblib.dump(scaler, random_filename_scaler)
+    save_training_state(random_filename_model, dataset_file, len(y), find_row_offset(dataset_file, len(y)))
 
     print(f"\n✅ Model saved to: {random_filename_model}")
     print(f"✅ Scaler saved to: {random_filename_scaler}")
     
     print("\n⚠️  IMPORTANT: Please update 'config.py' with these new filenames!")
 
+# -----------------------------
+# Streaming (out-of-core) training
+# -----------------------------
+def read_csv_header(dataset_file):
+    with open(dataset_file, "r", newline="") as f:
+        return next(csv.reader(f))
+
+def fit_scaler_streaming(dataset_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """First pass: fits the StandardScaler incrementally on the training rows, one CSV chunk at a time."""
+    scaler = StandardScaler()
+    row_offset = 0
+    for chunk in pd.read_csv(dataset_file, usecols=FEATURE_COLS, chunksize=chunk_size):
+        row_index = np.arange(row_offset, row_offset + len(chunk))
+        train_rows = chunk[FEATURE_COLS].values[row_index % VALIDATION_EVERY != 0]
+        if len(train_rows):
+            scaler.partial_fit(train_rows)
+        row_offset += len(chunk)
+    return scaler, row_offset
+
+def make_streaming_datasets(dataset_file, scaler, batch_size=DEFAULT_BATCH_SIZE, shuffle_buffer=DEFAULT_SHUFFLE_BUFFER):
+    """Builds train/validation tf.data pipelines that parse the CSV lazily, in parallel, batch by batch."""
+    header = read_csv_header(dataset_file)
+
+    # decode_csv needs ascending column indices; remember where each feature lands
+    wanted = FEATURE_COLS + [TARGET_COL]
+    select_cols = sorted(header.index(col) for col in wanted)
+    position = {header[idx]: pos for pos, idx in enumerate(select_cols)}
+    feature_positions = [position[col] for col in FEATURE_COLS]
+    target_position = position[TARGET_COL]
+
+    mean = tf.constant(scaler.mean_, dtype=tf.float32)
+    scale = tf.constant(scaler.scale_, dtype=tf.float32)
+
+    def parse_batch(lines):
+        columns = tf.io.decode_csv(lines, record_defaults=[[0.0]] * len(select_cols), select_cols=select_cols)
+        features = tf.stack([columns[pos] for pos in feature_positions], axis=1)
+        return (features - mean) / scale, columns[target_position]
+
+    rows = tf.data.TextLineDataset(dataset_file).skip(1).enumerate()
+    train_lines = rows.filter(lambda i, line: i % VALIDATION_EVERY != 0).map(lambda i, line: line)
+    val_lines = rows.filter(lambda i, line: i % VALIDATION_EVERY == 0).map(lambda i, line: line)
+
+    train_ds = (
+        train_lines
+        .shuffle(shuffle_buffer, reshuffle_each_iteration=True)
+        .batch(batch_size)
+        .map(parse_batch, num_parallel_calls=tf.data.AUTOTUNE)
+        .prefetch(tf.data.AUTOTUNE)
+    )
+    val_ds = (
+        val_lines
+        .batch(max(batch_size, 1024))
+        .map(parse_batch, num_parallel_calls=tf.data.AUTOTUNE)
+        .prefetch(tf.data.AUTOTUNE)
+    )
+    return train_ds, val_ds
+
+def train_model_streaming(
+    dataset_file=DEFAULT_DATASET_FILE,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    batch_size=DEFAULT_BATCH_SIZE,
+    shuffle_buffer=DEFAULT_SHUFFLE_BUFFER,
+    epochs=DEFAULT_EPOCHS,
+):
+    """
+    Same model and callbacks as train_model, but the dataset is never fully loaded:
+    the scaler is fitted over a first chunked pass, then tf.data streams the CSV each epoch.
+    """
+    random_filename_model = MODEL_FILENAME_PREFIX + str(uuid.uuid4()) + ".h5"
+    random_filename_scaler = MODEL_FILENAME_PREFIX + str(uuid.uuid4()) + ".pkl"
+
+    if not os.path.exists(dataset_file):
+        raise FileNotFoundError(f"CSV file not found: {dataset_file}. Please check the filename.")
+
+    header = read_csv_header(dataset_file)
+    missing = set(FEATURE_COLS + [TARGET_COL]) - set(header)
+    if missing:
+        raise ValueError(f"Missing columns in CSV: {missing}")
+
+    # -----------------------------
+    # Pass 1: incremental scaler fit
+    # -----------------------------
+    scaler, total_rows = fit_scaler_streaming(dataset_file, chunk_size)
+    print(f"✅ Fitted scaler over {total_rows} rows (streaming): {dataset_file}")
+
+    # -----------------------------
+    # Streaming input pipeline
+    # -----------------------------
+    train_ds, val_ds = make_streaming_datasets(dataset_file, scaler, batch_size, shuffle_buffer)
+
+    model = build_model()
+    early_stopping, checkpoint = build_callbacks(random_filename_model)
+
+    model.fit(
+        train_ds,
+        epochs=epochs,
+        validation_data=val_ds,
+        verbose=1,
+        callbacks=[early_stopping, checkpoint]
+    )
+
+    best_model = load_keras_model(random_filename_model)
+    loss, mae = best_model.evaluate(val_ds, verbose=0)
+
+    print(f"\n✅ Model Evaluation (Best Model):")
+    print(f"  MSE: {loss:.2f}")
+    print(f"  MAE: {mae:.2f} ml")
+
+    joblib.dump(scaler, random_filename_scaler)
+    save_training_state(random_filename_model, dataset_file, total_rows, find_row_offset(dataset_file, total_rows))
+
+    print(f"\n✅ Model saved to: {random_filename_model}")
+    print(f"✅ Scaler saved to: {random_filename_scaler}")
+
+    print("\n⚠️  IMPORTANT: Please update 'config.py' with these new filenames!")
+
+# -----------------------------
+# Warm-start fine-tuning
+# -----------------------------
+def check_feature_schema(model, scaler, columns):
+    """Refuses to continue if the model, scaler or new data don't match FEATURE_COLS."""
+    problems = []
+    model_inputs = model.input_shape[-1]
+    if model_inputs != INPUT_DIMENSION:
+        problems.append(f"model expects {model_inputs} features, FEATURE_COLS has {INPUT_DIMENSION}")
+    if getattr(scaler, "n_features_in_", INPUT_DIMENSION) != INPUT_DIMENSION:
+        problems.append(f"scaler was fitted on {scaler.n_features_in_} features, FEATURE_COLS has {INPUT_DIMENSION}")
+    scaler_names = getattr(scaler, "feature_names_in_", None)
+    if scaler_names is not None and list(scaler_names) != FEATURE_COLS:
+        problems.append(f"scaler feature names {list(scaler_names)} differ from FEATURE_COLS")
+    missing = set(FEATURE_COLS + [TARGET_COL]) - set(columns)
+    if missing:
+        problems.append(f"new data is missing columns {sorted(missing)}")
+    if problems:
+        raise ValueError("Feature schema mismatch, refusing to fine-tune: " + "; ".join(problems))
+
+def training_state_path(model_path):
+    return os.path.splitext(model_path)[0] + TRAINING_STATE_SUFFIX
+
+def save_training_state(model_path, dataset_file, rows, byte_offset):
+    """Records how far into dataset_file the model has been trained, for the next fine-tune."""
+    path = training_state_path(model_path)
+    with open(path, "w") as f:
+        json.dump({"dataset": os.path.basename(dataset_file), "rows": rows, "byte_offset": byte_offset}, f, indent=4)
+    print(f"✅ Training state saved to: {path} ({rows} rows)")
+
+def load_training_state(model_path):
+    path = training_state_path(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+def find_row_offset(dataset_file, rows):
+    """Byte offset just past the header and `rows` data lines; scans raw lines without CSV parsing."""
+    with open(dataset_file, "rb") as f:
+        f.readline()
+        for _ in range(rows):
+            if not f.readline().endswith(b"\n"):
+                raise ValueError(f"{dataset_file} has fewer than {rows} complete data rows.")
+        return f.tell()
+
+def read_rows_from(dataset_file, columns, byte_offset):
+    """Parses the complete rows after byte_offset; returns (DataFrame, offset just past the last complete row)."""
+    with open(dataset_file, "rb") as f:
+        f.seek(byte_offset)
+        data = f.read()
+    # A row still being appended (no trailing newline yet) is left for the next run
+    data = data[:data.rfind(b"\n") + 1]
+    if not data.strip():
+        return pd.DataFrame(columns=FEATURE_COLS + [TARGET_COL]), byte_offset
+    df = pd.read_csv(io.BytesIO(data), header=None, names=columns, usecols=FEATURE_COLS + [TARGET_COL])
+    return df, byte_offset + len(data)
+
+def finetune_model(
+    dataset_file,
+    base_model_path=MODEL_PATH,
+    base_scaler_path=SCALER_PATH,
+    since_row=None,
+    learning_rate=DEFAULT_FINETUNE_LEARNING_RATE,
+    epochs=DEFAULT_FINETUNE_EPOCHS,
+    batch_size=DEFAULT_BATCH_SIZE,
+):
+    """
+    Continues training the production model on newly appended rows only. The
+    production scaler is reused unchanged so the pretrained weights see the same
+    input scaling. By default the rows the base model was trained through are read
+    from its training state file and skipped with a seek, so the cost is
+    proportional to the new data; `since_row` overrides it.
+    """
+    random_filename_model = MODEL_FILENAME_PREFIX + str(uuid.uuid4()) + ".h5"
+    random_filename_scaler = MODEL_FILENAME_PREFIX + str(uuid.uuid4()) + ".pkl"
+
+    if not os.path.exists(dataset_file):
+        raise FileNotFoundError(f"CSV file not found: {dataset_file}. Please check the filename.")
+
+    model = load_keras_model(base_model_path)
+    scaler = joblib.load(base_scaler_path)
+    print(f"✅ Loaded base model: {base_model_path}")
+
+    header = read_csv_header(dataset_file)
+    check_feature_schema(model, scaler, header)
+
+    if since_row is None:
+        state = load_training_state(base_model_path)
+        if state is None:
+            raise ValueError(
+                f"No training state found for {base_model_path} ({training_state_path(base_model_path)}); "
+                "pass --since-row with the number of rows it was trained on."
+            )
+        if state["dataset"] != os.path.basename(dataset_file):
+            raise ValueError(f"{base_model_path} was trained on {state['dataset']}, not {dataset_file}; pass --since-row explicitly.")
+        since_row, byte_offset = state["rows"], state["byte_offset"]
+    else:
+        byte_offset = find_row_offset(dataset_file, since_row)
+
+    with open(dataset_file, "rb") as f:
+        f.seek(max(byte_offset - 1, 0))
+        if byte_offset > os.path.getsize(dataset_file) or (byte_offset and f.read(1) != b"\n"):
+            raise ValueError(f"Training state offset {byte_offset} doesn't end a row of {dataset_file}; was the file rewritten?")
+
+    df, end_offset = read_rows_from(dataset_file, header, byte_offset)
+    if len(df) < 2:
+        raise ValueError(f"Not enough new rows to fine-tune on ({len(df)} after skipping {since_row}).")
+    print(f"✅ Loaded {len(df)} new rows from: {dataset_file}")
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        df[FEATURE_COLS].values, df[TARGET_COL].values, test_size=0.2, random_state=42
+    )
+    X_train_scaled = scaler.transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate), loss="mse", metrics=["mae"])
+    before_loss, before_mae = model.evaluate(X_test_scaled, y_test, verbose=0)
+
+    early_stopping, checkpoint = build_callbacks(random_filename_model)
+    model.fit(
+        X_train_scaled, y_train,
+        epochs=epochs,
+        batch_size=batch_size,
+        validation_data=(X_test_scaled, y_test),
+        verbose=1,
+        callbacks=[early_stopping, checkpoint]
+    )
+
+    best_model = load_keras_model(random_filename_model)
+    best_model.compile(optimizer="adam", loss="mse", metrics=["mae"])
+    loss, mae = best_model.evaluate(X_test_scaled, y_test, verbose=0)
+
+    print(f"\n✅ Fine-tune Evaluation (held-out new rows):")
+    print(f"  Before: MSE {before_loss:.2f}, MAE {before_mae:.2f} ml")
+    print(f"  After:  MSE {loss:.2f}, MAE {mae:.2f} ml")
+
+    joblib.dump(scaler, random_filename_scaler)
+    save_training_state(random_filename_model, dataset_file, since_row + len(df), end_offset)
+
+    print(f"\n✅ Model saved to: {random_filename_model}")
+    print(f"✅ Scaler saved to: {random_filename_scaler}")
+
+    print("\n⚠️  IMPORTANT: Please update 'config.py' with these new filenames!")
+
+def probe_load(kind, model_path, scaler_path=""):
+    """Import + load time and peak RSS for one serving format, measured in a clean process."""
+    output = subprocess.run(
+        [sys.executable, "-c", LOAD_PROBE, kind, model_path, scaler_path],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def export_quantized_model(
+    dataset_file,
+    base_model_path=MODEL_PATH,
+    base_scaler_path=SCALER_PATH,
+    dtype="int8",
+    output_path=None,
+    max_error_ml=DEFAULT_QUANTIZE_MAX_ERROR_ML,
+):
+    """
+    Writes the model's weights as float16 or int8, together with the scaler, to a
+    single .npz served by INFERENCE_BACKEND=quantized. The export is checked against
+    the float32 model on the held-out split and deleted if it drifts too far.
+    """
+    output_path = output_path or os.path.splitext(base_model_path)[0] + f".{dtype}.npz"
+
+    network = DenseNetwork.from_h5(base_model_path)
+    scaler = joblib.load(base_scaler_path)
+    network.save_quantized(output_path, scaler, dtype)
+    quantized, quantized_scaler = DenseNetwork.from_quantized(output_path)
+
+    # -----------------------------
+    # Accuracy check on the held-out split
+    # -----------------------------
+    X, y = load_dataset(dataset_file)
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    reference = network.predict(scaler.transform(X_test))[:, 0]
+    predicted = quantized.predict(quantized_scaler.transform(X_test))[:, 0]
+    drift = np.abs(predicted - reference)
+
+    print(f"\n✅ {dtype} vs float32 on {len(X_test)} held-out rows:")
+    print(f"  Drift: mean {drift.mean():.2f} ml, max {drift.max():.2f} ml")
+    print(f"  MAE:   float32 {np.mean(np.abs(reference - y_test)):.2f} ml, {dtype} {np.mean(np.abs(predicted - y_test)):.2f} ml")
+
+    if drift.max() > max_error_ml:
+        os.remove(output_path)
+        raise ValueError(f"Quantized predictions drift up to {drift.max():.2f} ml (limit {max_error_ml} ml); export removed.")
+
+    # -----------------------------
+    # Footprint report
+    # -----------------------------
+    print(f"\n✅ Footprint (load = import + read in a fresh process, RSS = process peak):")
+    print(f"  {'format':<12}{'file':>12}{'weights':>12}{'load':>12}{'RSS':>12}")
+    sources = [
+        ("keras", base_model_path, base_scaler_path, network.nbytes),
+        ("numpy", base_model_path, base_scaler_path, network.nbytes),
+        (dtype, output_path, "", quantized.nbytes),
+    ]
+    for name, model_path, scaler_path, weight_bytes in sources:
+        size = os.path.getsize(model_path) + (os.path.getsize(scaler_path) if scaler_path else 0)
+        stats = probe_load("quantized" if model_path == output_path else name, model_path, scaler_path)
+        print(f"  {name:<12}{size / 1024:>9.1f} KB{weight_bytes / 1024:>9.1f} KB"
+              f"{stats['load_ms']:>9.0f} ms{stats['rss_mb']:>9.1f} MB")
+
+    print(f"\n✅ Quantized model saved to: {output_path}")
+    print("⚠️  Serve it with INFERENCE_BACKEND=quantized (and QUANTIZED_MODEL_PATH if you changed the path).")
+    return output_path
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Train the hydration prediction model.")
     parser.add_argument("--dataset", type=str, default=DEFAULT_DATASET_FILE, help="Path to the CSV dataset file.")
+    parser.add_argument("--mode", type=str, choices=["memory", "streaming", "finetune", "quantize"], default="memory", help="'memory' loads the whole CSV; 'streaming' reads it in chunks through tf.data; 'finetune' warm-starts from MODEL_PATH on new rows; 'quantize' exports MODEL_PATH as float16/int8.")
+    parser.add_argument("--no-cache", action="store_true", help="[memory] Parse the CSV even if a feature store exists (see feature_store.py).")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="[streaming] Rows per chunk for the scaler pass.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="[streaming/finetune] Training batch size.")
+    parser.add_argument("--shuffle-buffer", type=int, default=DEFAULT_SHUFFLE_BUFFER, help="[streaming] Shuffle buffer size in rows.")
+    parser.add_argument("--epochs", type=int, default=None, help=f"[streaming/finetune] Maximum epochs (default {DEFAULT_EPOCHS} / {DEFAULT_FINETUNE_EPOCHS}; early stopping still applies).")
+    parser.add_argument("--base-model", type=str, default=MODEL_PATH, help="[finetune/quantize] Model to warm-start from or export.")
+    parser.add_argument("--base-scaler", type=str, default=SCALER_PATH, help="[finetune/quantize] Scaler that belongs to the base model.")
+    parser.add_argument("--since-row", type=int, default=None, help="[finetune] Skip this many data rows (default: the row count in the base model's .trained.json).")
+    parser.add_argument("--learning-rate", type=float, default=DEFAULT_FINETUNE_LEARNING_RATE, help="[finetune] Adam learning rate.")
+    parser.add_argument("--quantize-dtype", type=str, choices=QUANTIZED_DTYPES, default="int8", help="[quantize] Weight format.")
+    parser.add_argument("--output", type=str, default=None, help="[quantize] Output .npz (default: <base model>.<dtype>.npz).")
+    parser.add_argument("--max-error-ml", type=float, default=DEFAULT_QUANTIZE_MAX_ERROR_ML, help="[quantize] Reject the export if any held-out prediction drifts more than this.")
     args = parser.parse_args()
     
-    train_model(dataset_file=args.dataset)
\ No newline at end of file
+    if args.mode == "streaming":
+        train_model_streaming(
+            dataset_file=args.dataset,
+            chunk_size=args.chunk_size,
+            batch_size=args.batch_size,
+            shuffle_buffer=args.shuffle_buffer,
+            epochs=args.epochs or DEFAULT_EPOCHS,
+        )
+    elif args.mode == "finetune":
+        finetune_model(
+            dataset_file=args.dataset,
+            base_model_path=args.base_model,
+            base_scaler_path=args.base_scaler,
+            since_row=args.since_row,
+            learning_rate=args.learning_rate,
+            epochs=args.epochs or DEFAULT_FINETUNE_EPOCHS,
+            batch_size=args.batch_size,
+        )
+    elif args.mode == "quantize":
+        export_quantized_model(
+            dataset_file=args.dataset,
+            base_model_path=args.base_model,
+            base_scaler_path=args.base_scaler,
+            dtype=args.quantize_dtype,
+            output_path=args.output,
+            max_error_ml=args.max_error_ml,
+        )
+    else:
+        train_model(dataset_file=args.dataset, use_cache=not args.no_cache)
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+Local stand-in Ollama servers for exercising the backend pool without real models.
+
+Each port serves the two endpoints AiService uses: GET /api/tags (health probe)
+and non-streaming POST /api/chat, which sleeps for --delay seconds (plus up to
+--jitter) and answers with which stand-in served it. GET /stats returns the
+per-server request counts. --fail-every makes a server answer every Nth chat
+with HTTP 500 to exercise health tracking.
+
+Example:
+    python ollama_standin.py --ports 11434 11435 11436 --delay 0.5
+    OLLAMA_BASE_URLS=http://127.0.0.1:11434,http://127.0.0.1:11435,http://127.0.0.1:11436 python app.py
+"""
+import argparse
+import datetime
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import OLLAMA_MODEL_NAME
+
+
+class StandInServer(ThreadingHTTPServer):
+    # Bursts of concurrent clients must not overflow the listen backlog (socketserver default: 5)
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def build_handler(name, delay, jitter, fail_every, model_name):
+    counters = {"chat": 0, "failed": 0, "in_flight": 0, "max_in_flight": 0}
+    lock = threading.Lock()
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, payload, status=200):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self.send_json({"models": [{"name": model_name, "model": model_name}]})
+            elif self.path == "/stats":
+                with lock:
+                    self.send_json(dict(counters, name=name))
+            else:
+                self.send_json({"error": "not found"}, status=404)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path != "/api/chat":
+                self.send_json({"error": "not found"}, status=404)
+                return
+
+            with lock:
+                counters["chat"] += 1
+                counters["in_flight"] += 1
+                counters["max_in_flight"] = max(counters["max_in_flight"], counters["in_flight"])
+                failing = fail_every and counters["chat"] % fail_every == 0
+            try:
+                time.sleep(delay + random.uniform(0, jitter))
+            finally:
+                with lock:
+                    counters["in_flight"] -= 1
+
+            if failing:
+                with lock:
+                    counters["failed"] += 1
+                self.send_json({"error": f"stand-in {name} failing on purpose"}, status=500)
+                return
+
+            last_message = body.get("messages", [{}])[-1].get("content", "")
+            self.send_json({
+                "model": body.get("model", model_name),
+                "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "message": {"role": "assistant", "content": f"[{name}] {last_message}"},
+                "done": True,
+                "done_reason": "stop",
+            })
+
+    return StandInHandler
+
+
+def serve(ports, host, delay, jitter, fail_every, model_name):
+    servers = []
+    for port in ports:
+        handler = build_handler(f"{host}:{port}", delay, jitter, fail_every, model_name)
+        server = StandInServer((host, port), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        print(f"✅ Stand-in Ollama listening on http://{host}:{port}")
+
+    print(f"OLLAMA_BASE_URLS={','.join(f'http://{host}:{port}' for port in ports)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run local stand-in Ollama servers.")
+    parser.add_argument("--ports", type=int, nargs="+", default=[11434], help="One stand-in server per port.")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind.")
+    parser.add_argument("--delay", type=float, default=0.5, help="Seconds each chat generation takes.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random seconds per generation.")
+    parser.add_argument("--fail-every", type=int, default=0, help="Answer every Nth chat with HTTP 500 (0 = never).")
+    parser.add_argument("--model", type=str, default=OLLAMA_MODEL_NAME, help="Model name reported by /api/tags.")
+    args = parser.parse_args()
+
+    serve(args.ports, args.host, args.delay, args.jitter, args.fail_every, args.model)
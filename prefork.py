@@ -0,0 +1,151 @@
+"""
+Pre-fork production server (Linux/macOS).
+
+The master process imports the app once, loading the model weights, scaler and
+intents, then forks the workers so they share those pages copy-on-write.
+
+Fork-safety safeguards:
+  * The model is served by the NumPy backend (INFERENCE_BACKEND=numpy, or
+    =quantized for the float16/int8 export), because TensorFlow hangs in a child
+    forked after its runtime has started.
+  * BLAS/OpenMP pools are limited to one thread per worker before NumPy is imported.
+  * gc.freeze() runs before forking, so the collector does not dirty shared pages.
+  * Each worker reseeds `random` and reopens its Ollama connection pool.
+
+Sessions are shared through a SQLite database (USER_SESSIONS_DB_PATH) rather
+than each worker's memory: a turn reads and upserts only its own session row, so
+no sticky routing is needed and a recycled worker never serves stale sessions.
+Two requests for the same session that overlap in different workers still race
+(the last save wins), exactly as two threads of one worker do.
+
+Workers are recycled gracefully after PREFORK_MAX_REQUESTS (+ jitter) requests, or
+once their private memory exceeds PREFORK_WORKER_MAX_PRIVATE_MB. Each worker logs
+a memory report (RSS / PSS / shared / private) after boot, every
+PREFORK_MEMORY_REPORT_EVERY requests, and on exit.
+
+Run with:  python prefork.py
+"""
+import os
+
+os.environ.setdefault("INFERENCE_BACKEND", "numpy")
+for thread_var in ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"]:
+    os.environ.setdefault(thread_var, "1")
+
+import gc
+import random
+import sys
+
+from gunicorn.app.base import BaseApplication
+
+from config import (
+    INFERENCE_BACKEND, PREFORK_BIND, PREFORK_WORKERS, PREFORK_THREADS,
+    PREFORK_MAX_REQUESTS, PREFORK_MAX_REQUESTS_JITTER, PREFORK_GRACEFUL_TIMEOUT,
+    PREFORK_WORKER_MAX_PRIVATE_MB, PREFORK_MEMORY_REPORT_EVERY
+)
+
+
+def memory_report():
+    """Returns the current process memory in MB, split into shared and private pages (Linux only)."""
+    report = {}
+    try:
+        with open("/proc/self/smaps_rollup", "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[2] == "kB":
+                    report[parts[0].rstrip(":")] = int(parts[1]) / 1024.0
+    except OSError:
+        import resource
+        return {"rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0}
+
+    return {
+        "rss": report.get("Rss", 0.0),
+        "pss": report.get("Pss", 0.0),
+        "shared": report.get("Shared_Clean", 0.0) + report.get("Shared_Dirty", 0.0),
+        "private": report.get("Private_Clean", 0.0) + report.get("Private_Dirty", 0.0),
+    }
+
+
+def log_memory(label):
+    stats = memory_report()
+    text = ", ".join(f"{k}={v:.1f}MB" for k, v in stats.items())
+    print(f"[MEMORY] pid={os.getpid()} {label}: {text}", flush=True)
+    return stats
+
+
+# -----------------------------
+# Gunicorn hooks
+# -----------------------------
+def when_ready(server):
+    if "tensorflow" in sys.modules:
+        print("⚠️  TensorFlow was imported in the master; forked workers may hang on inference.", flush=True)
+    # Move everything loaded so far into the permanent generation so GC in the
+    # workers never writes to (and un-shares) the master's object pages
+    gc.collect()
+    gc.freeze()
+    log_memory("master ready")
+
+
+def post_fork(server, worker):
+    from services.ai_service import ai_service
+
+    random.seed()
+    ai_service.initialize_ollama_client()
+    worker.handled_requests = 0
+    log_memory("worker booted")
+
+
+def post_request(worker, req, environ, resp):
+    worker.handled_requests += 1
+    if PREFORK_MEMORY_REPORT_EVERY <= 0 or worker.handled_requests % PREFORK_MEMORY_REPORT_EVERY:
+        return
+
+    stats = log_memory(f"after {worker.handled_requests} requests")
+    if PREFORK_WORKER_MAX_PRIVATE_MB and stats.get("private", 0.0) > PREFORK_WORKER_MAX_PRIVATE_MB:
+        print(f"[RECYCLE] pid={os.getpid()} private memory over {PREFORK_WORKER_MAX_PRIVATE_MB}MB, restarting gracefully.", flush=True)
+        worker.alive = False
+
+
+def worker_exit(server, worker):
+    from services.profiling_service import profiling_service
+
+    # Workers leave through os._exit, so atexit handlers never run here
+    profiling_service.flush()
+    log_memory(f"worker exiting after {getattr(worker, 'handled_requests', 0)} requests")
+
+
+class PreforkServer(BaseApplication):
+    def __init__(self, application, options):
+        self.application = application
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+if __name__ == "__main__":
+    if INFERENCE_BACKEND not in ["numpy", "quantized"]:
+        raise SystemExit("prefork.py requires INFERENCE_BACKEND=numpy or quantized (TensorFlow is not fork-safe).")
+
+    # Loads model, scaler and intents once, in the master
+    from app import app
+
+    options = {
+        "bind": PREFORK_BIND,
+        "workers": PREFORK_WORKERS,
+        "threads": PREFORK_THREADS,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "max_requests": PREFORK_MAX_REQUESTS,
+        "max_requests_jitter": PREFORK_MAX_REQUESTS_JITTER,
+        "graceful_timeout": PREFORK_GRACEFUL_TIMEOUT,
+        "when_ready": when_ready,
+        "post_fork": post_fork,
+        "post_request": post_request,
+        "worker_exit": worker_exit,
+    }
+    PreforkServer(app, options).run()
@@ -0,0 +1,44 @@
+from flask import Blueprint, jsonify, request
+from services.hydration_service import hydration_service
+from services.ai_service import ai_service
+from services.speculation_service import speculation_service
+from services.profiling_service import profiling_service, PROFILE_TOKEN_HEADER
+from config import READINESS_REQUIRES_OLLAMA, INFERENCE_BACKEND
+
+health_bp = Blueprint("health", __name__)
+
+@health_bp.route("/healthz", methods=["GET"])
+def healthz():
+    # Liveness only: the process is up and serving requests
+    return jsonify({"status": "ok"})
+
+@health_bp.route("/readyz", methods=["GET"])
+def readyz():
+    model_check = {
+        "ready": hydration_service.ready,
+        "backend": INFERENCE_BACKEND,
+        "warmup_ms": hydration_service.warmup_ms,
+    }
+    ollama_check = dict(ai_service.check_health())
+    ollama_check["required"] = READINESS_REQUIRES_OLLAMA
+
+    is_ready = hydration_service.ready and (ollama_check["reachable"] or not READINESS_REQUIRES_OLLAMA)
+
+    return jsonify({
+        "status": "ready" if is_ready else "not_ready",
+        "checks": {
+            "model": model_check,
+            "ollama": ollama_check,
+        }
+    }), 200 if is_ready else 503
+
+@health_bp.route("/stats", methods=["GET"])
+def stats():
+    # Runtime counters for the serving optimizations; they expose backend URLs and load, so admin only
+    if not profiling_service.has_admin_token(request.headers):
+        return jsonify({"status": "error", "message": f"Send the admin token in the {PROFILE_TOKEN_HEADER} header."}), 403
+    return jsonify({
+        "speculation": speculation_service.stats(),
+        "llm_coalescing": ai_service.in_flight.stats(),
+        "ollama_pool": ai_service.pool.stats(),
+    })
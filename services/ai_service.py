@@ -1,76 +1,127 @@
-import ollama
-import requests
-from config import OLLAMA_BASE_URL, OLLAMA_MODEL_NAME
+import time
+from config import (
+    OLLAMA_BASE_URLS, OLLAMA_MODEL_NAME, OLLAMA_HEALTH_CACHE_SECONDS,
+    LLM_COALESCING_ENABLED
+)
+from services.ollama_pool import OllamaPool
+from services.single_flight import SingleFlight, payload_key
+
+SYSTEM_PROMPT = (
+    "You are Maruf AI. A professional health and hydration assistant. Format all responses using Markdown:\n\n"
+    "**Structure Guidelines:**\n"
+    "- Use headings (## Heading) to organize main topics\n"
+    "- Use '---' on a new line to create visual separators between major sections\n"
+    "- Use **bold** for key terms and emphasis\n"
+    "- Use *italic* for subtle emphasis\n"
+    "- Use bullet lists (- item) for steps, tips, or multiple points\n"
+    "- Use numbered lists (1. item) for sequential steps or rankings\n\n"
+    "**Code Formatting:**\n"
+    "- For code examples, use triple backticks with language: ```python\\ncode here\\n```\n"
+    "- For inline code or commands, use single backticks: `code`\n\n"
+    "**Tables:**\n"
+    "- Use markdown tables for comparisons or structured data\n\n"
+    "**Tone:**\n"
+    "- Be clear, concise, and helpful\n"
+    "- Use proper spacing between sections for readability\n"
+    "- Keep responses well-organized and scannable"
+)
+
+CHAT_OPTIONS = {
+    "temperature": 0.6,
+}
+
+UNAVAILABLE_MESSAGE = "I'm sorry, the AI service is currently unavailable. I can only perform hydration analysis."
+FAILED_MESSAGE = "I'm sorry, I couldn't process that request right now."
 
 class AiService:
     def __init__(self):
-        self.ollama_client = None
+        self.pool = OllamaPool(OLLAMA_BASE_URLS)
+        self._health = None
+        self._health_checked_at = 0.0
+        # Identical in-flight generations (same model, options and messages) run once and are shared
+        self.in_flight = SingleFlight(enabled=LLM_COALESCING_ENABLED)
         self.initialize_ollama_client()
 
     def initialize_ollama_client(self):
-        """Initializes the Ollama client and tests connection to the server."""
+        """(Re)creates the clients for every Ollama backend and tests the connection to each."""
         print("[STARTING] Initializing Ollama Client...")
-        try:
-            self.ollama_client = ollama.Client(host=OLLAMA_BASE_URL)
-            # Attempt to list models to confirm connection and authentication
-            self.ollama_client.list()
-            print(f"[SUCCESS] Ollama Client connected successfully to {OLLAMA_BASE_URL}")
-
-        except requests.exceptions.ConnectionError:
-            print(f"[FAILED] Error: Could not connect to Ollama server at {OLLAMA_BASE_URL}.")
-            print(
-                "Please ensure the Ollama application is running and the model is pulled."
-            )
-            self.ollama_client = None
-        except Exception as e:
-            print(f"[FAILED-ERROR] Error during Ollama initialization: {e}")
-            self.ollama_client = None
-
-    def get_gemma_response(self, user_message, chat_history):
-        if not self.ollama_client:
-             return "I'm sorry, the AI service is currently unavailable. I can only perform hydration analysis."
-
-        system_prompt = (
-            "You are Maruf AI. A professional health and hydration assistant. Format all responses using Markdown:\n\n"
-            "**Structure Guidelines:**\n"
-            "- Use headings (## Heading) to organize main topics\n"
-            "- Use '---' on a new line to create visual separators between major sections\n"
-            "- Use **bold** for key terms and emphasis\n"
-            "- Use *italic* for subtle emphasis\n"
-            "- Use bullet lists (- item) for steps, tips, or multiple points\n"
-            "- Use numbered lists (1. item) for sequential steps or rankings\n\n"
-            "**Code Formatting:**\n"
-            "- For code examples, use triple backticks with language: ```python\\ncode here\\n```\n"
-            "- For inline code or commands, use single backticks: `code`\n\n"
-            "**Tables:**\n"
-            "- Use markdown tables for comparisons or structured data\n\n"
-            "**Tone:**\n"
-            "- Be clear, concise, and helpful\n"
-            "- Use proper spacing between sections for readability\n"
-            "- Keep responses well-organized and scannable"
-        )
+        self.pool.connect()
+        self._health = None
+        for result in self.pool.probe():
+            if result["reachable"]:
+                print(f"[SUCCESS] Ollama Client connected successfully to {result['url']}")
+            else:
+                print(f"[FAILED] Error: Could not connect to Ollama server at {result['url']}: {result['error']}")
+        if not self.pool.available():
+            print("Please ensure the Ollama application is running and the model is pulled.")
+
+    def check_health(self):
+        """Probes every Ollama backend (cached for a few seconds); a backend that answers is routed to again."""
+        now = time.monotonic()
+        if self._health is not None and now - self._health_checked_at < OLLAMA_HEALTH_CACHE_SECONDS:
+            return self._health
+
+        backends = self.pool.probe()
+        reachable = [result for result in backends if result["reachable"]]
+        self._health = {"reachable": bool(reachable), "backends": backends}
+        if reachable:
+            self._health["latency_ms"] = min(result["latency_ms"] for result in reachable)
+        self._health_checked_at = now
+        return self._health
 
+    def build_messages(self, user_message, chat_history):
         system_message = {
             "role": "system", 
-            "content": system_prompt
+            "content": SYSTEM_PROMPT
         }
+        return [system_message] + chat_history + [{"role": "user", "content": user_message}]
+
+    def coalescing_key(self, messages_payload):
+        return payload_key(OLLAMA_MODEL_NAME, CHAT_OPTIONS, messages_payload)
+
+    def generate(self, messages_payload, session_id=None):
+        response = self.pool.chat(
+            session_id,
+            model=OLLAMA_MODEL_NAME,
+            messages=messages_payload,
+            options=CHAT_OPTIONS
+        )
+        return response["message"]["content"]
+
+    async def generate_async(self, messages_payload, session_id=None):
+        response = await self.pool.chat_async(
+            session_id,
+            model=OLLAMA_MODEL_NAME,
+            messages=messages_payload,
+            options=CHAT_OPTIONS
+        )
+        return response["message"]["content"]
 
-        messages_payload = [system_message] + chat_history + [{"role": "user", "content": user_message}]
+    def get_gemma_response(self, user_message, chat_history, session_id=None):
+        if not self.pool.available():
+             return UNAVAILABLE_MESSAGE
+
+        messages_payload = self.build_messages(user_message, chat_history)
 
         try:
-            response = self.ollama_client.chat(
-                model=OLLAMA_MODEL_NAME, 
-                messages=messages_payload, 
-                options={
-                    "temperature": 0.6,
-                }
-            )
+            return self.in_flight.run(self.coalescing_key(messages_payload), self.generate, messages_payload, session_id)
+
+        except Exception as e:
+            print(f"Error generating Ollama response: {e}")
+            return FAILED_MESSAGE
+
+    async def get_gemma_response_async(self, user_message, chat_history, session_id=None):
+        """Same as get_gemma_response, but awaits the generation instead of holding a worker thread."""
+        if not self.pool.available():
+             return UNAVAILABLE_MESSAGE
 
-            raw_response = response["message"]["content"]
-            return raw_response
+        messages_payload = self.build_messages(user_message, chat_history)
+
+        try:
+            return await self.in_flight.run_async(self.coalescing_key(messages_payload), self.generate_async, messages_payload, session_id)
 
         except Exception as e:
             print(f"Error generating Ollama response: {e}")
-            return "I'm sorry, I couldn't process that request right now."
+            return FAILED_MESSAGE
 
 ai_service = AiService()
@@ -0,0 +1,142 @@
+import json
+import h5py
+import numpy as np
+
+ACTIVATIONS = {
+    "relu": lambda x: np.maximum(x, 0.0, out=x),
+    "linear": lambda x: x,
+    None: lambda x: x,
+}
+
+# Layers that are no-ops at inference time
+PASSTHROUGH_LAYERS = ["InputLayer", "Dropout"]
+
+# Weight formats for the compact .npz export
+QUANTIZED_DTYPES = ["float16", "int8"]
+QUANTIZED_FORMAT_VERSION = 1
+
+
+class StandardScalerParams:
+    """The transform() half of a fitted sklearn StandardScaler, without importing sklearn."""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.n_features_in_ = len(mean)
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class DenseNetwork:
+    """
+    NumPy forward pass for the Dense-only hydration network.
+
+    Weights are read straight from the Keras .h5 file with h5py, so TensorFlow is
+    never imported. The arrays are plain read-only buffers, which lets a pre-fork
+    master share them copy-on-write with every worker.
+    """
+
+    def __init__(self, layers):
+        # list of (kernel, bias, activation_name, kernel_scale); kernel_scale is None
+        # unless the kernel is int8, in which case it holds the per-column dequantization factors
+        self.layers = layers
+
+    @classmethod
+    def from_h5(cls, path):
+        with h5py.File(path, "r") as f:
+            model_config = json.loads(f.attrs["model_config"])
+            weights_group = f["model_weights"]
+
+            layers = []
+            for layer in model_config["config"]["layers"]:
+                class_name = layer["class_name"]
+                if class_name in PASSTHROUGH_LAYERS:
+                    continue
+                if class_name != "Dense":
+                    raise ValueError(f"Unsupported layer for NumPy inference: {class_name}")
+
+                config = layer["config"]
+                activation = config.get("activation")
+                if activation not in ACTIVATIONS:
+                    raise ValueError(f"Unsupported activation for NumPy inference: {activation}")
+
+                layer_group = weights_group[config["name"]]
+                weight_names = [n.decode() if isinstance(n, bytes) else n for n in layer_group.attrs["weight_names"]]
+                kernel = np.array(layer_group[next(n for n in weight_names if n.endswith("kernel"))], dtype=np.float32)
+                if config.get("use_bias", True):
+                    bias = np.array(layer_group[next(n for n in weight_names if n.endswith("bias"))], dtype=np.float32)
+                else:
+                    bias = np.zeros(kernel.shape[1], dtype=np.float32)
+
+                kernel.setflags(write=False)
+                bias.setflags(write=False)
+                layers.append((kernel, bias, activation, None))
+
+        return cls(layers)
+
+    @classmethod
+    def from_quantized(cls, path):
+        """Loads a file written by save_quantized; returns (network, scaler)."""
+        with np.load(path, allow_pickle=False) as f:
+            if int(f["version"]) != QUANTIZED_FORMAT_VERSION:
+                raise ValueError(f"Unsupported quantized model version: {int(f['version'])}")
+            activations = json.loads(str(f["activations"]))
+            layers = []
+            for i, activation in enumerate(activations):
+                kernel_scale = f[f"kernel_scale_{i}"] if f"kernel_scale_{i}" in f.files else None
+                layers.append((f[f"kernel_{i}"], f[f"bias_{i}"], activation, kernel_scale))
+            scaler = StandardScalerParams(f["scaler_mean"], f["scaler_scale"])
+
+        for layer in layers:
+            for array in layer[:2]:
+                array.setflags(write=False)
+        return cls(layers), scaler
+
+    def save_quantized(self, path, scaler, dtype):
+        """
+        Writes the weights as float16, or as int8 with one symmetric scale per output
+        unit, together with the scaler's mean/scale, into a single uncompressed .npz.
+        Biases stay float32 (they are a few hundred bytes).
+        """
+        if dtype not in QUANTIZED_DTYPES:
+            raise ValueError(f"Unsupported quantization dtype: {dtype}")
+
+        arrays = {
+            "version": np.array(QUANTIZED_FORMAT_VERSION),
+            "activations": np.array(json.dumps([activation for _, _, activation, _ in self.layers])),
+            "scaler_mean": np.asarray(scaler.mean_, dtype=np.float64),
+            "scaler_scale": np.asarray(scaler.scale_, dtype=np.float64),
+        }
+        for i, (kernel, bias, _, kernel_scale) in enumerate(self.layers):
+            if kernel_scale is not None:
+                raise ValueError("Network is already quantized; export from the float32 model.")
+            if dtype == "float16":
+                arrays[f"kernel_{i}"] = kernel.astype(np.float16)
+            else:
+                max_abs = np.abs(kernel).max(axis=0)
+                column_scale = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+                arrays[f"kernel_{i}"] = np.round(kernel / column_scale).astype(np.int8)
+                arrays[f"kernel_scale_{i}"] = column_scale
+            arrays[f"bias_{i}"] = bias.astype(np.float32)
+
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @property
+    def nbytes(self):
+        return sum(
+            kernel.nbytes + bias.nbytes + (0 if kernel_scale is None else kernel_scale.nbytes)
+            for kernel, bias, _, kernel_scale in self.layers
+        )
+
+    def predict(self, X, verbose=0):
+        """Matches keras Model.predict for a 2-D float input; returns shape (n, units_of_last_layer)."""
+        out = np.asarray(X, dtype=np.float32)
+        for kernel, bias, activation, kernel_scale in self.layers:
+            # float16/int8 kernels are promoted to float32 by the matmul
+            out = out @ kernel
+            if kernel_scale is not None:
+                out *= kernel_scale
+            out = ACTIVATIONS[activation](out + bias)
+        return out
@@ -0,0 +1,314 @@
+from services.session_service import session_service
+from services.ai_service import ai_service
+from services.hydration_service import hydration_service
+from services.feature_normalizer import feature_normalizer, parse_int, parse_numeric_text
+from services.speculation_service import speculation_service
+from config import (
+    ACTIVITY_MAP, GENDER_MAP_REVERSE, ACTIVITY_MAP_REVERSE,
+    COMPLICATION_MAP_REVERSE, STANDARD_GLASS_ML, SUB_ACTIVITY_OPTIONS,
+    DIALOG_DELAY_MS, PREDICTION_DELAY_MS, FEATURE_RANGES
+)
+
+# Fields the frontend must send for the "profile already known" shortcut
+CORE_FEATURES = {"age", "gender", "weight", "activity", "complication", "humidity_scale", "temperature"}
+
+# Dialog states that keep the conversation inside the hydration flow
+FLOW_STATES = ["ask_permission", "data_collection_started"]
+
+# Permission replies, checked in order against the lowercased message
+PERMISSION_REPLIES = [
+    ("granted", ["yes", "yup", "sure", "ok"]),
+    ("denied", ["no", "nope", "not now"]),
+]
+
+# Answer validation while collecting fields: numeric fields and (min, max, error message) ranges
+NUMERIC_FIELDS = ["age", "weight", "temperature", "humidity_scale"]
+FIELD_RANGES = {
+    "humidity_scale": (*FEATURE_RANGES["humidity_scale"], "The humidity scale must be a number between 1 (very high) and 5 (very low). Please enter a valid scale value."),
+}
+
+# Fields whose answer triggers a follow-up question before the next REQUIRED_FEATURES entry
+FOLLOW_UP_FIELDS = {"activity": "sub_activity"}
+
+MAX_CHAT_HISTORY = 20
+
+
+class DialogService:
+    """
+    Table-driven hydration dialog. Each state maps to a handler that updates the
+    session and response, then returns the next state to run in the same turn
+    (or None to wait for the user's next message).
+    """
+
+    def __init__(self):
+        self.transitions = {
+            "chat": self.on_chat,
+            "start_data_collection": self.on_start,
+            "ask_permission": self.on_permission,
+            "data_collection_started": self.on_field_answer,
+            "data_collection_complete": self.on_complete,
+        }
+        # Coroutine variants of the states that wait on the LLM or the model (used by asgi.py)
+        self.async_transitions = {
+            "chat": self.on_chat_async,
+            "data_collection_complete": self.on_complete_async,
+        }
+
+    def handle_message(self, session_id, user_message, local_data):
+        session = session_service.get_session(session_id)
+        turn, state = self.start_turn(session_id, session, user_message, local_data)
+        while state is not None:
+            state = self.transitions[state](turn)
+
+        session_service.save_session(session_id)
+        return turn["payload"]
+
+    async def handle_message_async(self, session_id, user_message, local_data):
+        # The session store read runs on a worker thread, not on the event loop
+        session = await session_service.get_session_async(session_id)
+        turn, state = self.start_turn(session_id, session, user_message, local_data)
+        while state is not None:
+            if state in self.async_transitions:
+                state = await self.async_transitions[state](turn)
+            else:
+                state = self.transitions[state](turn)
+
+        await session_service.save_session_async(session_id)
+        return turn["payload"]
+
+    def start_turn(self, session_id, session, user_message, local_data):
+        """Builds the turn context and picks the first state to run for this message."""
+        turn = {
+            "session_id": session_id,
+            "session": session,
+            "message": user_message,
+            "local_data": local_data,
+            "payload": {"response": "", "ask_for": None, "delay_ms": 0},
+        }
+
+        detected_tag = None
+        if CORE_FEATURES.issubset(local_data.keys()) and not session.get("data"):
+            self.merge_local_data(session, local_data)
+            session["last_intent"] = "data_collection_complete"
+        else:
+            detected_tag, _ = hydration_service.get_intent_response(user_message)
+
+        if detected_tag == "start_data_collection":
+            return turn, "start_data_collection"
+        if session.get("last_intent") in FLOW_STATES:
+            return turn, session["last_intent"]
+        return turn, "chat"
+
+    def merge_local_data(self, session, local_data):
+        for key, value in local_data.items():
+            session["data"][key] = value.lower() if isinstance(value, str) else value
+        session["features"] = feature_normalizer.normalize(session["data"])
+
+    def session_features(self, session):
+        """The session's normalized feature record; built once, then updated per answer by set_field."""
+        if "features" not in session:
+            session["features"] = feature_normalizer.normalize(session["data"])
+        return session["features"]
+
+    def local_features(self, turn):
+        if "local_features" not in turn:
+            turn["local_features"] = feature_normalizer.normalize(turn["local_data"])
+        return turn["local_features"]
+
+    def set_field(self, session, field, value):
+        session["data"][field] = value
+        feature_normalizer.update(self.session_features(session), field, value)
+
+    def pace(self, turn, delay_ms):
+        """Accumulates a client-side pacing hint instead of sleeping the worker."""
+        turn["payload"]["delay_ms"] += delay_ms
+
+    def ask_next_field(self, turn, prefix=None):
+        """Asks for the first missing feature, or moves to prediction when none is left."""
+        session = turn["session"]
+        payload = turn["payload"]
+        next_field = feature_normalizer.first_missing(self.session_features(session), self.local_features(turn))
+
+        if next_field is None:
+            session["last_intent"] = "data_collection_complete"
+            session["current_field"] = None
+            payload["response"] = f"{prefix} Moving to prediction..." if prefix else "Thank you! I have all the data. Calculating recommendation..."
+            payload["ask_for"] = None
+            return "data_collection_complete"
+
+        session["last_intent"] = "data_collection_started"
+        session["current_field"] = next_field
+        speculation_service.maybe_speculate(turn["session_id"], self.session_features(session), self.local_features(turn))
+        question = hydration_service.get_intent_response_by_tag(f"ask_{next_field}")
+        payload["response"] = f"{prefix} {question}" if prefix else question
+        payload["ask_for"] = next_field
+        return None
+
+    # ----------------------------
+    # STATE HANDLERS
+    # ----------------------------
+    def on_chat(self, turn):
+        session = turn["session"]
+        gemma_response_text = ai_service.get_gemma_response(turn["message"], session["chat_history"], turn["session_id"])
+        return self.finish_chat(turn, gemma_response_text)
+
+    async def on_chat_async(self, turn):
+        session = turn["session"]
+        gemma_response_text = await ai_service.get_gemma_response_async(turn["message"], session["chat_history"], turn["session_id"])
+        return self.finish_chat(turn, gemma_response_text)
+
+    def finish_chat(self, turn, gemma_response_text):
+        session = turn["session"]
+        payload = turn["payload"]
+        payload["response"] = gemma_response_text
+
+        session["chat_history"].append({"role": "user", "content": turn["message"]})
+        session["chat_history"].append({"role": "assistant", "content": gemma_response_text})
+        if len(session["chat_history"]) > MAX_CHAT_HISTORY:
+            session["chat_history"] = session["chat_history"][-MAX_CHAT_HISTORY:]
+
+        payload["ask_for"] = None
+        session["current_field"] = None
+        return None
+
+    def on_start(self, turn):
+        session = turn["session"]
+        session["last_intent"] = "ask_permission"
+        speculation_service.discard(turn["session_id"])
+        session["data"] = {}
+        session["features"] = feature_normalizer.normalize(session["data"])
+        session["current_field"] = None
+
+        self.pace(turn, DIALOG_DELAY_MS)
+        turn["payload"]["response"] = hydration_service.get_intent_response_by_tag("ask_permission")
+        turn["payload"]["ask_for"] = "permission_check"
+        return None
+
+    def on_permission(self, turn):
+        msg_lower = turn["message"].lower()
+        reply = next((kind for kind, words in PERMISSION_REPLIES if any(word in msg_lower for word in words)), None)
+        self.pace(turn, DIALOG_DELAY_MS)
+
+        if reply == "granted":
+            self.merge_local_data(turn["session"], turn["local_data"])
+            return self.ask_next_field(turn, prefix=hydration_service.get_intent_response_by_tag("confirmation"))
+
+        self.pace(turn, DIALOG_DELAY_MS)
+        if reply == "denied":
+            session_service.clear_session(turn["session_id"])
+            speculation_service.discard(turn["session_id"])
+            turn["payload"]["response"] = hydration_service.get_intent_response_by_tag("denial")
+        else:
+            turn["payload"]["response"] = hydration_service.get_intent_response_by_tag("fallback_permission_retry")
+            turn["payload"]["ask_for"] = "permission_check"
+        return None
+
+    def on_field_answer(self, turn):
+        session = turn["session"]
+        payload = turn["payload"]
+        current_field = session.get("current_field")
+        input_value = turn["message"].strip()
+
+        error = self.validate_field(current_field, input_value)
+        if error:
+            self.pace(turn, DIALOG_DELAY_MS)
+            payload["response"] = error
+            payload["ask_for"] = current_field
+            return None
+
+        if current_field:
+            self.set_field(session, current_field, input_value.lower())
+
+        if current_field == "activity":
+            activity_level_int = ACTIVITY_MAP.get(input_value.lower(), 0)
+            session["data"]["activity_level_int"] = activity_level_int
+            options_text = ", ".join(SUB_ACTIVITY_OPTIONS.get(activity_level_int, []))
+            payload["response"] = f"You chose {input_value.capitalize()} activity. Which type of activity do you usually do? (Options: {options_text})"
+
+        if current_field in FOLLOW_UP_FIELDS:
+            session["current_field"] = FOLLOW_UP_FIELDS[current_field]
+            payload["ask_for"] = FOLLOW_UP_FIELDS[current_field]
+            return None
+
+        if current_field == "sub_activity":
+            # Sub-activity names are matched case-insensitively later, keep the user's casing for display
+            self.set_field(session, "sub_activity", input_value)
+
+        return self.ask_next_field(turn)
+
+    def validate_field(self, field, value):
+        if field not in NUMERIC_FIELDS:
+            return None
+        if parse_numeric_text(value) is None:
+            return f"Sorry, I need a valid number for {field}. Please try again."
+        if field in FIELD_RANGES:
+            low, high, message = FIELD_RANGES[field]
+            parsed = parse_int(value)
+            if parsed is None or not (low <= parsed <= high):
+                return message
+        return None
+
+    def on_complete(self, turn):
+        self.pace(turn, PREDICTION_DELAY_MS)
+        session = turn["session"]
+        features = self.session_features(session)
+        prediction_result = speculation_service.lookup(turn["session_id"], features["values"])
+        if prediction_result is None:
+            prediction_result = hydration_service.predict_intake(session["data"], features)
+        return self.finish_prediction(turn, prediction_result)
+
+    async def on_complete_async(self, turn):
+        self.pace(turn, PREDICTION_DELAY_MS)
+        session = turn["session"]
+        features = self.session_features(session)
+        prediction_result = await speculation_service.lookup_async(turn["session_id"], features["values"])
+        if prediction_result is None:
+            prediction_result = await hydration_service.predict_intake_async(session["data"], features)
+        return self.finish_prediction(turn, prediction_result)
+
+    def finish_prediction(self, turn, prediction_result):
+        payload = turn["payload"]
+        session_service.clear_session(turn["session_id"])
+        payload["response"] = hydration_service.get_intent_response_by_tag("response_loading")
+        payload["summary"] = self.build_summary(prediction_result)
+        payload["ask_for"] = None
+        return None
+
+    def build_summary(self, p):
+        predicted_intake = p["predicted_intake"]
+        num_glasses = predicted_intake / STANDARD_GLASS_ML
+
+        tip_text = hydration_service.hydration_tip(
+            activity_level_int=p["activity"]["level"],
+            intensity_score=p["intensity_score"],
+            temperature=p["environment"]["temperature"],
+            complication=p["complication"],
+            is_indoors=p["environment"]["is_indoors"],
+            is_windy_or_fanned=p["environment"]["is_windy_or_fanned"],
+            is_direct_sun=p["environment"]["is_direct_sun"],
+            predicted_intake=predicted_intake
+        )
+
+        environment_text = f"{'Indoors' if p['environment']['is_indoors'] else 'Outdoors'}, Ground {'Wet' if p['environment']['is_ground_wet'] else 'Dry'}"
+        if p["environment"]["is_windy_or_fanned"]:
+            environment_text += ", Strong Wind/Fan"
+        if p["environment"]["is_direct_sun"]:
+            environment_text += ", Direct Sun ☀️"
+
+        return {
+            "title": "🧾 Hydration Summary",
+            "description": "Using the collected additional information, our model predicted or calculated how much water you should to take.",
+            "bullets": [
+                {"indent": 1, "text": f"👤 Profile: {p['profile']['age']} yo, {GENDER_MAP_REVERSE.get(p['profile']['gender'], 'N/A').capitalize()}, {p['profile']['weight']:.1f} kg"},
+                {"indent": 1, "text": f"🏃 Activity: {ACTIVITY_MAP_REVERSE.get(p['activity']['level'], 'N/A').capitalize()} - {p['activity']['name']} (Score: {p['intensity_score']:.2f})"},
+                {"indent": 1, "text": f"⏱️ Estimated Duration/Pace: {p['activity']['duration']:.0f} min, {p['activity']['pace']:.1f} km/h"},
+                {"indent": 1, "text": f"🌡️ Conditions: {p['environment']['temperature']:.1f}°C, Humidity Scale: {p['environment']['humidity_scale']}"},
+                {"indent": 1, "text": f"🏠 Environment: {environment_text}"},
+                {"indent": 1, "text": f"🩺 Complication: {COMPLICATION_MAP_REVERSE.get(p['complication'], 'N/A').capitalize()}"},
+            ],
+            "caution_text": "The predicted water intake is not always accurate, and this is not alternative to any health expert. Consider the result as a guide.",
+            "recommended_intake": f"~{predicted_intake:.0f} ml or {num_glasses:.1f} glasses",
+            "tip": tip_text,
+        }
+
+dialog_service = DialogService()
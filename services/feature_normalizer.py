@@ -0,0 +1,174 @@
+import math
+import re
+
+from config import (
+    REQUIRED_FEATURES, DEFAULT_VALUES, GENDER_MAP, ACTIVITY_MAP, COMPLICATION_MAP,
+    INDOORS_MAP, WET_GROUND_MAP, BINARY_MAP, FEATURE_RANGES, SUB_ACTIVITY_OPTIONS
+)
+
+NUMBER_PATTERN = re.compile(r"[-+]?\d*\.?\d+")
+
+# Free-text complications that count as severe when they aren't a COMPLICATION_MAP key
+SEVERE_COMPLICATION_KEYWORDS = ["diabetes", "renal", "kidney", "heart"]
+DEFAULT_SUB_ACTIVITY = "Yoga/Stretching"
+
+# Dialog validation: these must contain a number, the categorical ones must be a key of their map.
+# Every other required feature only has to be non-empty.
+NUMERIC_TEXT_FEATURES = ["age", "weight", "humidity", "temperature"]
+CATEGORICAL_FEATURES = {
+    "gender": GENDER_MAP,
+    "activity": ACTIVITY_MAP,
+    "is_indoors": INDOORS_MAP,
+    "is_ground_wet": WET_GROUND_MAP,
+    "is_windy_or_fanned": BINARY_MAP,
+    "is_direct_sun": BINARY_MAP,
+}
+
+
+def parse_numeric_text(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = NUMBER_PATTERN.search(str(value))
+    if match:
+        return float(match.group())
+    return None
+
+
+def parse_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def parse_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_blank(value):
+    return value is None or (isinstance(value, str) and value.strip() == "")
+
+
+def parse_complication(value):
+    text = value.lower() if isinstance(value, str) else ""
+    if text in COMPLICATION_MAP:
+        return COMPLICATION_MAP[text]
+    if any(word in text for word in SEVERE_COMPLICATION_KEYWORDS):
+        return COMPLICATION_MAP["severe"]
+    return 0
+
+
+# Parser behind each numeric feature's converter, for FeatureNormalizer.accepts
+NUMERIC_PARSERS = {
+    "age": parse_int,
+    "humidity_scale": parse_int,
+    "weight": parse_float,
+    "temperature": parse_numeric_text,
+}
+
+
+class FeatureNormalizer:
+    """
+    Turns a raw payload (frontend user_data, dialog answers, /predict-goal body)
+    into a typed feature record in one pass over REQUIRED_FEATURES.
+
+    A record is a plain JSON-able dict, so it can live on the session:
+      "values": model-ready value for every required feature, defaults applied
+      "valid":  {feature: passes dialog validation} for the features present in the payload
+    """
+
+    def __init__(self):
+        # (feature, validate, convert), compiled once from REQUIRED_FEATURES and the config maps
+        self.fields = [(feature, self.build_validator(feature), self.build_converter(feature)) for feature in REQUIRED_FEATURES]
+        self.field_index = {feature: i for i, feature in enumerate(REQUIRED_FEATURES)}
+
+    def build_validator(self, feature):
+        if feature in NUMERIC_TEXT_FEATURES:
+            return lambda value: parse_numeric_text(value) is not None
+        if feature in CATEGORICAL_FEATURES:
+            mapping = CATEGORICAL_FEATURES[feature]
+            return lambda value: str(value).lower() in mapping
+        return lambda value: True
+
+    def build_converter(self, feature):
+        default = DEFAULT_VALUES.get(feature)
+        if feature in ["age", "humidity_scale"]:
+            return lambda value: parse_int(value) or default
+        if feature == "weight":
+            return lambda value: parse_float(value) or default
+        if feature == "temperature":
+            return lambda value: parse_numeric_text(value) or default
+        if feature in CATEGORICAL_FEATURES:
+            mapping = CATEGORICAL_FEATURES[feature]
+            return lambda value: mapping.get(value.lower(), default) if isinstance(value, str) else default
+        if feature == "complication":
+            return parse_complication
+        if feature == "sub_activity":
+            return lambda value: value if isinstance(value, str) else DEFAULT_SUB_ACTIVITY
+        raise ValueError(f"No normalization rule for required feature: {feature}")
+
+    def accepts(self, feature, value):
+        """
+        Stricter than dialog validation: True only if `value` converts to a value of its own
+        (not the feature's default) within FEATURE_RANGES. Used to check explicit sweep values;
+        a sub_activity must still be checked against its activity level by the caller.
+        """
+        if is_blank(value) or isinstance(value, bool):
+            return False
+        if feature in NUMERIC_PARSERS:
+            parsed = NUMERIC_PARSERS[feature](value)
+            # The converters treat 0 like a missing value
+            if not parsed or not math.isfinite(parsed):
+                return False
+            low, high = FEATURE_RANGES[feature]
+            return low <= parsed <= high
+        if feature in CATEGORICAL_FEATURES:
+            return isinstance(value, str) and value.lower() in CATEGORICAL_FEATURES[feature]
+        if feature == "complication":
+            text = value.lower() if isinstance(value, str) else ""
+            return text in COMPLICATION_MAP or any(word in text for word in SEVERE_COMPLICATION_KEYWORDS)
+        if feature == "sub_activity":
+            return any(value in names for names in SUB_ACTIVITY_OPTIONS.values())
+        return True
+
+    def normalize(self, data):
+        record = {"values": {}, "valid": {}}
+        for feature, validate, convert in self.fields:
+            value = data.get(feature)
+            record["values"][feature] = convert(value)
+            if feature in data:
+                record["valid"][feature] = not is_blank(value) and validate(value)
+        return record
+
+    def update(self, record, feature, value):
+        """Re-normalizes one field in place after the dialog stores an answer; other keys are ignored."""
+        if feature not in self.field_index:
+            return record
+        _, validate, convert = self.fields[self.field_index[feature]]
+        record["values"][feature] = convert(value)
+        record["valid"][feature] = not is_blank(value) and validate(value)
+        return record
+
+    def is_valid(self, record, feature, fallback=None):
+        """A feature present in `record` is judged by it alone; otherwise `fallback` (e.g. this turn's local data) is consulted."""
+        if feature in record["valid"]:
+            return record["valid"][feature]
+        return fallback is not None and fallback["valid"].get(feature, False)
+
+    def first_missing(self, record, fallback=None):
+        """First required feature that is missing or invalid."""
+        for feature in REQUIRED_FEATURES:
+            if not self.is_valid(record, feature, fallback):
+                return feature
+        return None
+
+    def missing(self, record, fallback=None):
+        """Every required feature that is still missing or invalid, in the order the dialog asks for them."""
+        return [feature for feature in REQUIRED_FEATURES if not self.is_valid(record, feature, fallback)]
+
+feature_normalizer = FeatureNormalizer()
@@ -1,36 +1,68 @@
 import re
 import json
+import asyncio
+import itertools
 import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import tensorflow as tf
-from tf_keras import losses
-from tf_keras import metrics
 import joblib
 
 from config import (
-    MODEL_PATH, INTENTS_PATH, SCALER_PATH, REQUIRED_FEATURES,
-    GENDER_MAP, ACTIVITY_MAP, COMPLICATION_MAP, INDOORS_MAP,
-    WET_GROUND_MAP, BINARY_MAP, GENDER_MAP_REVERSE,
-    ACTIVITY_MAP_REVERSE, COMPLICATION_MAP_REVERSE, STANDARD_GLASS_ML,
-    DEFAULT_VALUES
+    MODEL_PATH, INTENTS_PATH, SCALER_PATH, REQUIRED_FEATURES, ACTIVITY_MAP,
+    ACTIVITY_MAP_REVERSE, SUB_ACTIVITY_OPTIONS, INFERENCE_WORKERS,
+    INFERENCE_MAX_PENDING, INFERENCE_BACKEND, QUANTIZED_MODEL_PATH,
+    SWEEP_MAX_AXES, SWEEP_MAX_POINTS, SWEEP_ACTIVITY_AXIS, SWEEP_RANGE_FIELDS,
+    SWEEP_DEFAULT_VALUES
 )
+from services.dense_model import DenseNetwork
+from services.feature_normalizer import feature_normalizer, parse_int, parse_float, parse_numeric_text
+from services.model_io import load_keras_model
+
+# Representative profile used to build the predict function and fill caches before serving
+WARMUP_PROFILE = {
+    "age": "30",
+    "gender": "male",
+    "weight": "70",
+    "activity": "medium",
+    "sub_activity": "Gym Workout",
+    "humidity_scale": "3",
+    "temperature": "30",
+    "complication": "none",
+    "is_indoors": "indoors",
+    "is_ground_wet": "no",
+    "is_windy_or_fanned": "yes",
+    "is_direct_sun": "no",
+}
+
+GOAL_MESSAGES = {
+    "severe_caution": "Goal calculated with severe health caution. Consult a doctor.",
+    "high_activity": "Goal adjusted for your high activity and biometrics.",
+    "standard": "Your personalized goal has been calculated successfully.",
+}
 
 class HydrationService:
     def __init__(self):
         self.model = None
         self.scaler = None
         self.intents = {"intents": []}
+        self.ready = False
+        self.warmup_ms = None
+        self._executor = None
+        self._pending = None
         self.load_assets()
+        self.warm_up()
 
-    def load_assets(self):
+    def load_assets(self, model_path=MODEL_PATH, scaler_path=SCALER_PATH, quantized_model_path=QUANTIZED_MODEL_PATH):
         try:
-            custom_objects = {
-                "mse": losses.MeanSquaredError(),
-                "mae": metrics.MeanAbsoluteError(),
-            }
-            self.model = tf.keras.models.load_model(MODEL_PATH, custom_objects=custom_objects)
-            self.scaler = joblib.load(SCALER_PATH)
+            if INFERENCE_BACKEND == "quantized":
+                self.model, self.scaler = DenseNetwork.from_quantized(quantized_model_path)
+            elif INFERENCE_BACKEND == "numpy":
+                self.model = DenseNetwork.from_h5(model_path)
+                self.scaler = joblib.load(scaler_path)
+            else:
+                self.model = load_keras_model(model_path)
+                self.scaler = joblib.load(scaler_path)
             with open(INTENTS_PATH, "r", encoding="utf-8") as f:
                 self.intents = json.load(f)
             print("✅ Model, scaler, and intents loaded successfully.")
@@ -39,57 +71,36 @@ class HydrationService:
             self.model = None
             self.intents = {"intents": []}
 
+    def warm_up(self):
+        """Runs one prediction so the first real request doesn't pay graph/predict-function construction."""
+        self.ready = False
+        if not (self.model and self.scaler):
+            print("❌ Skipping warm-up: model or scaler not loaded.")
+            return False
+        try:
+            started = time.perf_counter()
+            self.predict_intake(WARMUP_PROFILE)
+            self.get_intent_response("hello")
+            self.warmup_ms = round((time.perf_counter() - started) * 1000.0, 1)
+            self.ready = True
+            print(f"✅ Warm-up prediction done in {self.warmup_ms:.0f} ms.")
+        except Exception as e:
+            print(f"❌ Error during warm-up: {e}")
+        return self.ready
+
     def parse_numeric_text(self, value):
-        if value is None:
-            return None
-        if isinstance(value, (int, float)):
-            return float(value)
-        match = re.search(r"[-+]?\d*\.?\d+", str(value))
-        if match:
-            return float(match.group())
-        return None
+        return parse_numeric_text(value)
 
     def parse_int(self, value):
-        try:
-            return int(value)
-        except:
-            return None
+        return parse_int(value)
 
     def parse_float(self, value):
-        try:
-            return float(value)
-        except:
-            return None
+        return parse_float(value)
 
     def get_first_missing_feature(self, session_data, local_data):
-        all_data = {
-            k: v.lower() if isinstance(v, str) else v for k, v in local_data.items()
-        }
-        all_data.update(session_data)
-
-        for feature in REQUIRED_FEATURES:
-            value = all_data.get(feature)
-            if value is None or (isinstance(value, str) and value.strip() == ""):
-                return feature
-            if (
-                feature in ["age", "weight", "humidity", "temperature"]
-                and self.parse_numeric_text(value) is None
-            ):
-                return feature
-            if feature == "gender" and str(value).lower() not in GENDER_MAP:
-                return feature
-            if feature == "activity" and str(value).lower() not in ACTIVITY_MAP:
-                return feature
-            if feature == "is_indoors" and str(value).lower() not in INDOORS_MAP:
-                return feature
-            if feature == "is_ground_wet" and str(value).lower() not in WET_GROUND_MAP:
-                return feature
-            if (
-                feature in ["is_windy_or_fanned", "is_direct_sun"]
-                and str(value).lower() not in BINARY_MAP
-            ):
-                return feature
-        return None
+        return feature_normalizer.first_missing(
+            feature_normalizer.normalize(session_data), feature_normalizer.normalize(local_data)
+        )
 
     def get_intent_response(self, message):
         message = message.lower()
@@ -145,6 +156,17 @@ class HydrationService:
 
         return "\n\n".join(tip_parts)
 
+    def goal_category(self, complication, intensity_score):
+        """Which GOAL_MESSAGES variant a prediction gets."""
+        if complication == 2:
+            return "severe_caution"
+        elif intensity_score >= 0.6:
+            return "high_activity"
+        return "standard"
+
+    def goal_message(self, complication, intensity_score):
+        return GOAL_MESSAGES[self.goal_category(complication, intensity_score)]
+
     def map_activity_level_to_details(self, activity_level_int, sub_activity_name, age, weight, gender):
         activity_details_map = {
             0: [
@@ -209,69 +231,191 @@ class HydrationService:
         intentsity_score = (type_multiplier * duration_factor * pace_factor * terrain_factor * sweat_factor)
         return round(intentsity_score / 1.5, 2)
 
-    def predict_intake(self, data):
-        age = self.parse_int(data.get("age")) or DEFAULT_VALUES["age"]
-        weight = self.parse_float(data.get("weight")) or DEFAULT_VALUES["weight"]
-        gender = GENDER_MAP.get(data.get("gender", "").lower(), DEFAULT_VALUES["gender"])
-        humidity_scale = self.parse_int(data.get("humidity_scale")) or DEFAULT_VALUES["humidity_scale"]
-        temperature = self.parse_numeric_text(data.get("temperature")) or DEFAULT_VALUES["temperature"]
-        activity_level = ACTIVITY_MAP.get(data.get("activity", "").lower(), DEFAULT_VALUES["activity"])
-        sub_activity_name = data.get("sub_activity", "Yoga/Stretching")
-        
-        complication_str_raw = data.get("complication", "").lower()
-        if complication_str_raw in COMPLICATION_MAP:
-            complication = COMPLICATION_MAP[complication_str_raw]
-        elif any(word in complication_str_raw for word in ["diabetes", "renal", "kidney", "heart"]):
-            complication = 2
-        else:
-            complication = 0
-
-        is_indoors = INDOORS_MAP.get(data.get("is_indoors", "").lower(), DEFAULT_VALUES["is_indoors"])
-        is_ground_wet = WET_GROUND_MAP.get(data.get("is_ground_wet", "").lower(), DEFAULT_VALUES["is_ground_wet"])
-        is_windy_or_fanned = BINARY_MAP.get(data.get("is_windy_or_fanned", "").lower(), DEFAULT_VALUES["is_windy_or_fanned"])
-        is_direct_sun = BINARY_MAP.get(data.get("is_direct_sun", "").lower(), DEFAULT_VALUES["is_direct_sun"])
-
-        detailed_activity = self.map_activity_level_to_details(activity_level, sub_activity_name, age, weight, gender)
-        
-        # Unpack detailed activity
-        activity_type = detailed_activity["activity_type"]
-        duration_minutes = detailed_activity["duration_minutes"]
-        pace = detailed_activity["pace"]
-        terrain_type = detailed_activity["terrain_type"]
-        sweat_level = detailed_activity["sweat_level"]
-        
-        intensity_score = self.calculate_intensity_score(activity_type, duration_minutes, pace, terrain_type, sweat_level)
+    def build_model_input(self, values_list):
+        """
+        Model input matrix (FEATURE_COLS order) for normalized feature values, plus the
+        derived activity details and intensity score of each row.
+        """
+        rows, details, intensity_scores = [], [], []
+        for values in values_list:
+            detailed_activity = self.map_activity_level_to_details(
+                values["activity"], values["sub_activity"], values["age"], values["weight"], values["gender"]
+            )
+            intensity_score = self.calculate_intensity_score(
+                detailed_activity["activity_type"], detailed_activity["duration_minutes"], detailed_activity["pace"],
+                detailed_activity["terrain_type"], detailed_activity["sweat_level"]
+            )
+            rows.append(self.model_row(values, detailed_activity, intensity_score))
+            details.append(detailed_activity)
+            intensity_scores.append(intensity_score)
+        return np.array(rows), details, intensity_scores
+
+    def model_row(self, values, detailed_activity, intensity_score):
+        """One model input row, in FEATURE_COLS order."""
+        return [
+            values["age"], values["gender"], values["weight"], values["humidity_scale"], values["temperature"],
+            values["complication"], values["is_indoors"], values["is_ground_wet"], values["is_windy_or_fanned"],
+            values["is_direct_sun"], detailed_activity["activity_type"], detailed_activity["duration_minutes"],
+            detailed_activity["pace"], detailed_activity["terrain_type"], detailed_activity["sweat_level"], intensity_score
+        ]
+
+    def predict_intake(self, data, features=None):
+        """`features` is feature_normalizer's record for `data`, when the caller already has one."""
+        values = (features or feature_normalizer.normalize(data))["values"]
+        X, details, intensity_scores = self.build_model_input([values])
 
         if self.model and self.scaler:
-             X = np.array([[
-                age, gender, weight, humidity_scale, temperature, complication,
-                is_indoors, is_ground_wet, is_windy_or_fanned, is_direct_sun,
-                activity_type, duration_minutes, pace, terrain_type, sweat_level, intensity_score
-            ]])
              X_scaled = self.scaler.transform(X)
              predicted_intake = float(self.model.predict(X_scaled)[0][0])
         else:
             predicted_intake = 2500.0 # Default fallback
 
+        return self.build_result(values, details[0], intensity_scores[0], predicted_intake)
+
+    def build_result(self, values, detailed_activity, intensity_score, predicted_intake):
         return {
             "predicted_intake": predicted_intake,
             "intensity_score": intensity_score,
-            "profile": {"age": age, "weight": weight, "gender": gender},
+            "profile": {"age": values["age"], "weight": values["weight"], "gender": values["gender"]},
             "environment": {
-                "temperature": temperature, 
-                "humidity_scale": humidity_scale,
-                "is_indoors": is_indoors,
-                "is_ground_wet": is_ground_wet,
-                "is_windy_or_fanned": is_windy_or_fanned,
-                "is_direct_sun": is_direct_sun
+                "temperature": values["temperature"], 
+                "humidity_scale": values["humidity_scale"],
+                "is_indoors": values["is_indoors"],
+                "is_ground_wet": values["is_ground_wet"],
+                "is_windy_or_fanned": values["is_windy_or_fanned"],
+                "is_direct_sun": values["is_direct_sun"]
             },
             "activity": {
-                "level": activity_level,
-                "name": sub_activity_name,
-                "duration": duration_minutes,
-                "pace": pace
+                "level": values["activity"],
+                "name": values["sub_activity"],
+                "duration": detailed_activity["duration_minutes"],
+                "pace": detailed_activity["pace"]
             },
-            "complication": complication
+            "complication": values["complication"]
         }
 
+    def predict_rows(self, X):
+        """Predicted intake (ml) for every row of an unscaled model input matrix, in one batch."""
+        if not (self.model and self.scaler):
+            return [2500.0] * len(X)  # Default fallback, as in predict_intake
+        return [float(v) for v in self.model.predict(self.scaler.transform(X), verbose=0)[:, 0]]
+
+    def sweep_axis(self, axis):
+        """Validates one sweep axis; returns (field, raw values to substitute into the profile)."""
+        if not isinstance(axis, dict):
+            raise ValueError("Each axis must be an object with a 'field'.")
+        field = axis.get("field")
+        if field != SWEEP_ACTIVITY_AXIS and field not in REQUIRED_FEATURES:
+            raise ValueError(f"Unknown sweep field: {field}")
+
+        if "values" in axis:
+            values = axis["values"]
+            if not isinstance(values, list) or not values:
+                raise ValueError(f"'values' for {field} must be a non-empty list.")
+        elif "start" in axis or "stop" in axis:
+            if field not in SWEEP_RANGE_FIELDS:
+                raise ValueError(f"{field} can't be swept as a range; give 'values' instead.")
+            try:
+                start, stop, step = float(axis["start"]), float(axis["stop"]), float(axis.get("step", 1))
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"A range sweep of {field} needs numeric 'start', 'stop' and optional 'step'.")
+            if step <= 0 or stop < start:
+                raise ValueError(f"Invalid range for {field}: start <= stop and step > 0 are required.")
+            count = int((stop - start) / step + 1e-9) + 1
+            if count > SWEEP_MAX_POINTS:
+                raise ValueError(f"Sweep is limited to {SWEEP_MAX_POINTS} points.")
+            values = [round(start + i * step, 6) for i in range(count)]
+        elif field == SWEEP_ACTIVITY_AXIS:
+            values = [f"{ACTIVITY_MAP_REVERSE[level]}/{name}" for level, names in SUB_ACTIVITY_OPTIONS.items() for name in names]
+        elif field in SWEEP_DEFAULT_VALUES:
+            values = SWEEP_DEFAULT_VALUES[field]
+        else:
+            raise ValueError(f"Give 'values' (or 'start'/'stop') for {field}.")
+
+        if field == SWEEP_ACTIVITY_AXIS:
+            for value in values:
+                level, _, name = str(value).partition("/")
+                if name not in SUB_ACTIVITY_OPTIONS.get(ACTIVITY_MAP.get(level.lower()), []):
+                    raise ValueError(f"Unknown activity option '{value}', expected '<level>/<sub-activity>'.")
+        else:
+            # An unparseable value would silently be predicted with the field's default
+            for value in values:
+                if not feature_normalizer.accepts(field, value):
+                    raise ValueError(f"Invalid value {value!r} for {field}.")
+        return field, values
+
+    def predict_sweep(self, data, axes):
+        """
+        Predicts one profile with one or two of its fields varied over a grid. Every
+        point goes through the scaler and model in a single batch.
+        """
+        if not isinstance(axes, list) or not 1 <= len(axes) <= SWEEP_MAX_AXES:
+            raise ValueError(f"Give between 1 and {SWEEP_MAX_AXES} axes.")
+        axes = [self.sweep_axis(axis) for axis in axes]
+        fields = [field for field, _ in axes]
+        swept = set(fields)
+        if len(swept) != len(fields) or (SWEEP_ACTIVITY_AXIS in swept and swept & {"activity", "sub_activity"}):
+            raise ValueError("Each field can only be swept once.")
+        points_count = 1
+        for _, values in axes:
+            points_count *= len(values)
+        if points_count > SWEEP_MAX_POINTS:
+            raise ValueError(f"Sweep is limited to {SWEEP_MAX_POINTS} points, this one has {points_count}.")
+
+        base = feature_normalizer.normalize(data)
+        combos = list(itertools.product(*[values for _, values in axes]))
+        values_list = []
+        for combo in combos:
+            record = {"values": dict(base["values"]), "valid": {}}
+            for field, value in zip(fields, combo):
+                if field == SWEEP_ACTIVITY_AXIS:
+                    level, _, name = value.partition("/")
+                    feature_normalizer.update(record, "activity", level)
+                    feature_normalizer.update(record, "sub_activity", name)
+                else:
+                    feature_normalizer.update(record, field, value)
+            if "sub_activity" in swept:
+                # Otherwise the model would silently get the activity level's first option
+                sub_activity, level = record["values"]["sub_activity"], record["values"]["activity"]
+                if sub_activity not in SUB_ACTIVITY_OPTIONS[level]:
+                    raise ValueError(
+                        f"Invalid value {sub_activity!r} for sub_activity with activity "
+                        f"'{ACTIVITY_MAP_REVERSE[level]}'; expected one of {SUB_ACTIVITY_OPTIONS[level]}."
+                    )
+            values_list.append(record["values"])
+
+        X, _, intensity_scores = self.build_model_input(values_list)
+        predictions = self.predict_rows(X)
+        points = []
+        for combo, predicted_intake, intensity_score in zip(combos, predictions, intensity_scores):
+            point = dict(zip(fields, combo))
+            point["predicted_intake"] = predicted_intake
+            point["intensity_score"] = intensity_score
+            points.append(point)
+
+        return {
+            "axes": [{"field": field, "values": values} for field, values in axes],
+            "points": points,
+        }
+
+    async def run_inference(self, fn, *args):
+        """Runs fn on a bounded inference pool so the event loop never blocks on Keras."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+            self._pending = asyncio.Semaphore(INFERENCE_MAX_PENDING)
+        async with self._pending:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def predict_intake_async(self, data, features=None):
+        return await self.run_inference(self.predict_intake, data, features)
+
+    async def predict_sweep_async(self, data, axes):
+        return await self.run_inference(self.predict_sweep, data, axes)
+
+    def shutdown_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._pending = None
+
 hydration_service = HydrationService()
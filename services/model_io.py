@@ -0,0 +1,11 @@
+def load_keras_model(path):
+    # Imported lazily so the "numpy" backend (used by the pre-fork server) never initializes TensorFlow
+    import tensorflow as tf
+    from tf_keras import losses
+    from tf_keras import metrics
+
+    custom_objects = {
+        "mse": losses.MeanSquaredError(),
+        "mae": metrics.MeanAbsoluteError(),
+    }
+    return tf.keras.models.load_model(path, custom_objects=custom_objects)
@@ -0,0 +1,222 @@
+import threading
+import time
+from collections import OrderedDict
+
+import ollama
+
+from config import (
+    OLLAMA_ROUTING, OLLAMA_SESSION_AFFINITY, OLLAMA_AFFINITY_SLACK, OLLAMA_MAX_AFFINITY_SESSIONS,
+    OLLAMA_BACKEND_FAILURE_THRESHOLD, OLLAMA_BACKEND_RETRY_SECONDS, OLLAMA_LATENCY_EWMA_ALPHA,
+    OLLAMA_HEALTH_TIMEOUT_SECONDS
+)
+
+ROUTING_STRATEGIES = ["least_outstanding", "latency"]
+
+
+class OllamaBackend:
+    """One Ollama server: its reusable clients plus the load/health state the pool routes on."""
+
+    def __init__(self, url):
+        self.url = url
+        self.client = None
+        self.async_client = None
+        self.probe_client = None
+        self.outstanding = 0
+        self.latency_ms = None  # EWMA over successful generations
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.affinity_hits = 0
+
+    def connect(self):
+        # Each client keeps its own httpx connection pool, so they are created once and reused
+        self.client = ollama.Client(host=self.url)
+        self.async_client = ollama.AsyncClient(host=self.url)
+        self.probe_client = ollama.Client(host=self.url, timeout=OLLAMA_HEALTH_TIMEOUT_SECONDS)
+
+    def available(self, now):
+        # A backend marked down becomes routable again after OLLAMA_BACKEND_RETRY_SECONDS;
+        # the next request to it doubles as the probe.
+        return now >= self.down_until
+
+    def stats(self, now):
+        return {
+            "url": self.url,
+            "available": self.available(now),
+            "outstanding": self.outstanding,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "affinity_hits": self.affinity_hits,
+        }
+
+
+class OllamaPool:
+    """
+    Spreads chat generations over several Ollama servers without a proxy in front.
+
+    Routing ("least_outstanding" or "latency") picks among the backends that are not
+    marked down. With session affinity a session keeps going to the backend that
+    served it last (so Ollama can reuse the cached prompt prefix of its history) unless
+    that backend is more than OLLAMA_AFFINITY_SLACK requests busier than the best one.
+    Connection failures fail over to the next backend; OLLAMA_BACKEND_FAILURE_THRESHOLD
+    consecutive failures mark a backend down for OLLAMA_BACKEND_RETRY_SECONDS.
+    """
+
+    def __init__(self, urls, routing=OLLAMA_ROUTING, session_affinity=OLLAMA_SESSION_AFFINITY):
+        if not urls:
+            raise ValueError("At least one Ollama backend URL is required.")
+        if routing not in ROUTING_STRATEGIES:
+            raise ValueError(f"Unknown OLLAMA_ROUTING: {routing} (expected one of {ROUTING_STRATEGIES})")
+        self.backends = [OllamaBackend(url) for url in urls]
+        self.routing = routing
+        self.session_affinity = session_affinity
+        self._lock = threading.Lock()
+        self._affinity = OrderedDict()  # session_id -> OllamaBackend
+        self._rotation = 0
+        self.failovers = 0
+
+    def connect(self):
+        """(Re)creates every backend's clients; called again after a fork (prefork.py)."""
+        with self._lock:
+            for backend in self.backends:
+                backend.connect()
+            self._affinity.clear()
+
+    def available(self):
+        now = time.monotonic()
+        return any(backend.available(now) for backend in self.backends)
+
+    def score(self, backend):
+        if self.routing == "latency":
+            # Expected wait: queued generations times this backend's typical generation time.
+            # Backends without a measurement yet score 0 so they get one.
+            return ((backend.outstanding + 1) * (backend.latency_ms or 0.0), backend.outstanding)
+        return (backend.outstanding, backend.latency_ms or 0.0)
+
+    def acquire(self, session_id=None, exclude=()):
+        """Picks a backend and counts the request as outstanding on it; None if none is available."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [backend for backend in self.backends if backend.available(now) and backend not in exclude]
+            if not candidates:
+                return None
+            # Rotate the scan start so ties don't always land on the first backend
+            self._rotation = (self._rotation + 1) % len(candidates)
+            candidates = candidates[self._rotation:] + candidates[:self._rotation]
+            backend = min(candidates, key=self.score)
+
+            if self.session_affinity and session_id is not None:
+                preferred = self._affinity.get(session_id)
+                if preferred in candidates and preferred.outstanding <= backend.outstanding + OLLAMA_AFFINITY_SLACK:
+                    backend = preferred
+                    backend.affinity_hits += 1
+                self._affinity[session_id] = backend
+                self._affinity.move_to_end(session_id)
+                while len(self._affinity) > OLLAMA_MAX_AFFINITY_SESSIONS:
+                    self._affinity.popitem(last=False)
+
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def is_backend_failure(self, error):
+        # A 4xx from Ollama (bad request, unknown model) says nothing about the server's health
+        return not (isinstance(error, ollama.ResponseError) and 0 <= error.status_code < 500)
+
+    def release(self, backend, started, error=None):
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        with self._lock:
+            backend.outstanding -= 1
+            if error is None:
+                backend.consecutive_failures = 0
+                backend.down_until = 0.0
+                if backend.latency_ms is None:
+                    backend.latency_ms = elapsed_ms
+                else:
+                    backend.latency_ms += OLLAMA_LATENCY_EWMA_ALPHA * (elapsed_ms - backend.latency_ms)
+            elif self.is_backend_failure(error):
+                backend.failures += 1
+                self.mark_failure(backend)
+
+    def mark_failure(self, backend):
+        backend.consecutive_failures += 1
+        if backend.consecutive_failures >= OLLAMA_BACKEND_FAILURE_THRESHOLD:
+            if backend.down_until <= time.monotonic():
+                print(f"⚠️  Ollama backend {backend.url} marked down after {backend.consecutive_failures} "
+                      f"consecutive failures; retrying in {OLLAMA_BACKEND_RETRY_SECONDS:.0f}s")
+            backend.down_until = time.monotonic() + OLLAMA_BACKEND_RETRY_SECONDS
+
+    def fail_over(self, backend, error, tried):
+        """True if the request should be retried on another backend (nothing reached this one)."""
+        if not isinstance(error, ConnectionError):
+            return False
+        tried.append(backend)
+        with self._lock:
+            self.failovers += 1
+        return True
+
+    def chat(self, session_id=None, **kwargs):
+        tried = []
+        while True:
+            backend = self.acquire(session_id, tried)
+            if backend is None:
+                raise ConnectionError(f"No Ollama backend available (tried {[b.url for b in tried]}).")
+            started = time.perf_counter()
+            try:
+                response = backend.client.chat(**kwargs)
+            except Exception as e:
+                self.release(backend, started, e)
+                if self.fail_over(backend, e, tried):
+                    continue
+                raise
+            self.release(backend, started)
+            return response
+
+    async def chat_async(self, session_id=None, **kwargs):
+        tried = []
+        while True:
+            backend = self.acquire(session_id, tried)
+            if backend is None:
+                raise ConnectionError(f"No Ollama backend available (tried {[b.url for b in tried]}).")
+            started = time.perf_counter()
+            try:
+                response = await backend.async_client.chat(**kwargs)
+            except Exception as e:
+                self.release(backend, started, e)
+                if self.fail_over(backend, e, tried):
+                    continue
+                raise
+            self.release(backend, started)
+            return response
+
+    def probe(self):
+        """Lists models on every backend; updates their health and returns one result per backend."""
+        results = []
+        for backend in self.backends:
+            started = time.perf_counter()
+            try:
+                backend.probe_client.list()
+                result = {"url": backend.url, "reachable": True, "latency_ms": round((time.perf_counter() - started) * 1000.0, 1)}
+                with self._lock:
+                    backend.consecutive_failures = 0
+                    backend.down_until = 0.0
+            except Exception as e:
+                result = {"url": backend.url, "reachable": False, "error": str(e)}
+                with self._lock:
+                    backend.consecutive_failures = max(backend.consecutive_failures, OLLAMA_BACKEND_FAILURE_THRESHOLD - 1)
+                    self.mark_failure(backend)
+            results.append(result)
+        return results
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "routing": self.routing,
+                "session_affinity": self.session_affinity,
+                "failovers": self.failovers,
+                "backends": [backend.stats(now) for backend in self.backends],
+            }
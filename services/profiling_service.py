@@ -0,0 +1,161 @@
+import atexit
+import cProfile
+import hmac
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from functools import wraps
+
+from flask import request
+
+from config import (
+    PROFILING_ENABLED, PROFILING_ADMIN_TOKEN, PROFILING_OUTPUT_DIR,
+    PROFILING_FORMAT, PROFILING_WINDOW_SECONDS, PROFILING_SAMPLE_INTERVAL_MS
+)
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+
+
+class StackSampler:
+    """Samples the call stack of one thread at a fixed interval and folds it into collapsed-stack lines."""
+
+    def __init__(self, thread_id, interval_seconds):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+
+class ProfilingService:
+    def __init__(self):
+        self.enabled = PROFILING_ENABLED
+        self.admin_token = PROFILING_ADMIN_TOKEN
+        self.output_dir = PROFILING_OUTPUT_DIR
+        self.output_format = PROFILING_FORMAT
+        self.window_seconds = PROFILING_WINDOW_SECONDS
+        self.sample_interval = PROFILING_SAMPLE_INTERVAL_MS / 1000.0
+
+        self._lock = threading.Lock()
+        self._window = {}
+        # A profile window is otherwise written only when a later request arrives
+        atexit.register(self.flush)
+
+    def has_admin_token(self, headers):
+        """True if the request carries PROFILING_ADMIN_TOKEN (never, when no token is configured)."""
+        token = headers.get(PROFILE_TOKEN_HEADER)
+        return bool(self.admin_token) and token is not None and hmac.compare_digest(
+            token.encode("utf-8"), self.admin_token.encode("utf-8")
+        )
+
+    def should_profile(self, headers):
+        return self.enabled or self.has_admin_token(headers)
+
+    def run(self, name, func, *args, **kwargs):
+        """Runs func under the configured profiler and records the result for the given endpoint name."""
+        if self.output_format == "collapsed":
+            sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            sampler.start()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, sampler.stop())
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler already owns this interpreter (e.g. a concurrent request on 3.12+)
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            self.record(name, profiler)
+
+    def record(self, name, result):
+        if self.window_seconds <= 0:
+            self._write(f"{name}_{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}", result)
+            return
+
+        with self._lock:
+            window = self._window.get(name)
+            if window is None:
+                window = self._window[name] = {"started": time.time(), "result": None, "requests": 0}
+
+            if isinstance(result, Counter):
+                window["result"] = (window["result"] or Counter()) + result
+            elif window["result"] is None:
+                window["result"] = pstats.Stats(result)
+            else:
+                window["result"].add(result)
+            window["requests"] += 1
+
+        self.flush(expired_only=True)
+
+    def flush(self, expired_only=False):
+        """Writes pending windows (all of them, or only those older than the window length)."""
+        now = time.time()
+        with self._lock:
+            names = [
+                name for name, window in self._window.items()
+                if not expired_only or now - window["started"] >= self.window_seconds
+            ]
+            windows = [(name, self._window.pop(name)) for name in names]
+
+        for name, window in windows:
+            started = time.strftime("%Y%m%d%H%M%S", time.localtime(window["started"]))
+            self._write(f"{name}_window_{started}_{window['requests']}req", window["result"])
+
+    def _write(self, basename, result):
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            if isinstance(result, Counter):
+                path = os.path.join(self.output_dir, basename + ".collapsed")
+                with open(path, "w", encoding="utf-8") as f:
+                    for stack, count in result.most_common():
+                        f.write(f"{stack} {count}\n")
+            else:
+                path = os.path.join(self.output_dir, basename + ".pstats")
+                stats = result if isinstance(result, pstats.Stats) else pstats.Stats(result)
+                stats.dump_stats(path)
+            print(f"[PROFILE] Wrote {path}")
+        except Exception as e:
+            print(f"❌ Error writing profile: {e}")
+
+    def profiled(self, name):
+        """Decorator for Flask view functions; profiles the call when enabled or requested with the admin token."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.should_profile(request.headers):
+                    return view(*args, **kwargs)
+                return self.run(name, view, *args, **kwargs)
+            return wrapper
+        return decorator
+
+profiling_service = ProfilingService()
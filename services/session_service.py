@@ -1,42 +1,140 @@
+import asyncio
 import json
 import os
-from config import USER_SESSIONS_PATH
+import sqlite3
+import threading
+from config import USER_SESSIONS_PATH, USER_SESSIONS_DB_PATH, SESSION_DB_TIMEOUT_SECONDS
+
 
 class SessionService:
+    """
+    Sessions are rows of a SQLite table (USER_SESSIONS_DB_PATH) shared by every process
+    serving the app (prefork.py workers, recycled workers, asgi.py). A chat turn reads
+    and writes only its own row: get_session() adopts the stored copy when another
+    process saved it since this one last synced it, save_session() upserts one row.
+    """
+
     def __init__(self):
         self.sessions = {}
+        self._synced = {}  # session_id -> JSON of the session as last read from / written to the store
+        self._local = threading.local()
         self.load_sessions()
 
     def load_sessions(self):
-        """Loads user sessions from the JSON file on startup."""
-        if os.path.exists(USER_SESSIONS_PATH):
+        """Creates the sessions table on startup; imports user_sessions.json the first time."""
+        try:
+            # Closed again right away: a SQLite connection must not be inherited by forked workers
+            conn = self._connect()
             try:
-                with open(USER_SESSIONS_PATH, "r") as f:
-                    data = f.read()
-                    self.sessions = json.loads(data) if data else {}
-                print(f"✅ Loaded {len(self.sessions)} user sessions from disk.")
-            except json.JSONDecodeError:
-                self.sessions = {}
-            except Exception as e:
-                print(f"❌ Error loading sessions: {e}")
-                self.sessions = {}
-        else:
-            self.sessions = {}
-
-    def save_sessions(self):
-        """Saves active user sessions to the JSON file."""
-        sessions_to_save = {
-            k: v
-            for k, v in self.sessions.items()
-            if v.get("last_intent") is not None or v.get("data")
-        }
+                with conn:
+                    conn.execute("CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+                    count = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+                    if count == 0 and os.path.exists(USER_SESSIONS_PATH):
+                        count = self._import_json(conn)
+            finally:
+                conn.close()
+            print(f"✅ {count} user sessions in {os.path.basename(USER_SESSIONS_DB_PATH)}.")
+        except Exception as e:
+            print(f"❌ Error loading sessions: {e}")
+
+    def _import_json(self, conn):
+        try:
+            with open(USER_SESSIONS_PATH, "r") as f:
+                data = f.read()
+                legacy = json.loads(data) if data else {}
+        except json.JSONDecodeError:
+            return 0
+        conn.executemany(
+            "INSERT OR IGNORE INTO sessions (session_id, data) VALUES (?, ?)",
+            [(session_id, self._dump(session)) for session_id, session in legacy.items()],
+        )
+        if legacy:
+            print(f"✅ Imported {len(legacy)} user sessions from {os.path.basename(USER_SESSIONS_PATH)}.")
+        return len(legacy)
+
+    def _connect(self):
+        conn = sqlite3.connect(USER_SESSIONS_DB_PATH, timeout=SESSION_DB_TIMEOUT_SECONDS)
+        # WAL: readers never wait for the (single-row) writes of other workers
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connection(self):
+        """One connection per thread, reopened after a fork (prefork.py)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._connect()
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _dump(self, session):
+        return json.dumps(session, sort_keys=True)
+
+    def _should_save(self, session):
+        return session.get("last_intent") is not None or bool(session.get("data"))
+
+    def save_session(self, session_id):
+        """Saves one session to the store."""
+        try:
+            self._write(session_id, self._pending_text(session_id))
+        except Exception as e:
+            print(f"❌ Error saving session: {e}")
+
+    async def save_session_async(self, session_id):
+        """Serializes the session on the event loop, then writes it on a worker thread."""
         try:
-            with open(USER_SESSIONS_PATH, "w") as f:
-                json.dump(sessions_to_save, f, indent=4)
+            text = self._pending_text(session_id)
+            await asyncio.get_running_loop().run_in_executor(None, self._write, session_id, text)
         except Exception as e:
-            print(f"❌ Error saving sessions: {e}")
+            print(f"❌ Error saving session: {e}")
+
+    def _pending_text(self, session_id):
+        session = self.sessions.get(session_id)
+        return self._dump(session) if session is not None and self._should_save(session) else None
+
+    def _write(self, session_id, text):
+        """Upserts one session's row; text None removes it."""
+        with self._connection() as conn:
+            if text is None:
+                conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            else:
+                conn.execute(
+                    "INSERT INTO sessions (session_id, data) VALUES (?, ?) "
+                    "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data",
+                    (session_id, text),
+                )
+        if text is None:
+            self._synced.pop(session_id, None)
+        else:
+            self._synced[session_id] = text
+
+    def _read(self, session_id):
+        row = self._connection().execute("SELECT data FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0] if row else None
 
     def get_session(self, session_id):
+        try:
+            text = self._read(session_id)
+        except Exception as e:
+            print(f"❌ Error reading session: {e}")
+            text = None
+        return self._adopt(session_id, text)
+
+    async def get_session_async(self, session_id):
+        """Like get_session(), with the store read on a worker thread."""
+        try:
+            text = await asyncio.get_running_loop().run_in_executor(None, self._read, session_id)
+        except Exception as e:
+            print(f"❌ Error reading session: {e}")
+            text = None
+        return self._adopt(session_id, text)
+
+    def _adopt(self, session_id, text):
+        if text is not None and text != self._synced.get(session_id):
+            # Saved by another process since this one last saw it
+            self.sessions[session_id] = json.loads(text)
+            self._synced[session_id] = text
+
         if session_id not in self.sessions:
             self.sessions[session_id] = {
                 "last_intent": None,
@@ -0,0 +1,101 @@
+import asyncio
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+
+
+def payload_key(*parts):
+    """Stable hash of JSON-able parts (dict key order does not matter)."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: the first caller for a key runs the work,
+    callers that arrive while it is in flight wait for it and share its result
+    (or its exception). Nothing is cached once the call finishes.
+
+    In-flight calls are tracked with concurrent.futures.Future, so threads
+    (Flask workers) and coroutines (asgi.py) can wait on each other's calls.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._in_flight = {}  # key -> {"future": Future, "callers": int}
+        self.counters = {
+            "calls": 0,
+            "executions": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "max_callers": 0,  # most callers served by a single execution
+        }
+
+    def join(self, key):
+        """Returns (future, is_leader); the leader must run the call and finish() the future."""
+        with self._lock:
+            self.counters["calls"] += 1
+            entry = self._in_flight.get(key) if self.enabled else None
+            if entry is not None:
+                entry["callers"] += 1
+                self.counters["coalesced"] += 1
+                self.counters["max_callers"] = max(self.counters["max_callers"], entry["callers"])
+                return entry["future"], False
+
+            future = Future()
+            if self.enabled:
+                self._in_flight[key] = {"future": future, "callers": 1}
+            self.counters["executions"] += 1
+            self.counters["max_callers"] = max(self.counters["max_callers"], 1)
+            return future, True
+
+    def finish(self, key, future, result=None, error=None):
+        with self._lock:
+            entry = self._in_flight.get(key)
+            if entry is not None and entry["future"] is future:
+                del self._in_flight[key]
+            if error is not None:
+                self.counters["errors"] += 1
+        if error is None:
+            future.set_result(result)
+        elif isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            # The leader was cancelled/interrupted; waiters get an ordinary error instead
+            future.set_exception(RuntimeError(f"In-flight call was interrupted: {error!r}"))
+
+    def run(self, key, fn, *args):
+        future, is_leader = self.join(key)
+        if not is_leader:
+            return future.result()
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result=result)
+        return result
+
+    async def run_async(self, key, fn, *args):
+        """Like run(), for a coroutine function; waiters don't block the event loop."""
+        future, is_leader = self.join(key)
+        if not is_leader:
+            # shield: a waiter that is cancelled must not cancel the shared call
+            return await asyncio.shield(asyncio.wrap_future(future))
+        try:
+            result = await fn(*args)
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result=result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["in_flight"] = len(self._in_flight)
+        stats["coalesced_ratio"] = round(stats["coalesced"] / stats["calls"], 4) if stats["calls"] else None
+        stats["enabled"] = self.enabled
+        return stats
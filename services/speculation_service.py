@@ -0,0 +1,167 @@
+import asyncio
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    SUB_ACTIVITY_OPTIONS, SWEEP_DEFAULT_VALUES,
+    SPECULATION_ENABLED, SPECULATION_MAX_COMBINATIONS, SPECULATION_WORKERS,
+    SPECULATION_WAIT_SECONDS, SPECULATION_MAX_SESSIONS
+)
+from services.feature_normalizer import feature_normalizer
+from services.hydration_service import hydration_service
+
+# Questions with a closed set of answers (sub_activity's depends on the activity level).
+# Any other missing field (age, weight, temperature) is open-ended and blocks speculation.
+SPECULATED_FIELDS = ["gender", "activity", "humidity_scale", "complication", "is_indoors", "is_ground_wet", "is_windy_or_fanned", "is_direct_sun"]
+
+
+class SpeculationService:
+    """
+    Background predictions for the end of the hydration dialog.
+
+    Once every question the dialog still has to ask is categorical and their
+    combinations are few, the model input row for each combination is built and
+    predicted in one batch on a background thread. The completion turn then looks
+    its own row up instead of running the model; a batch that is still running is
+    waited on rather than repeated.
+    """
+
+    def __init__(self):
+        self.enabled = SPECULATION_ENABLED
+        self._executor = None
+        self._lock = threading.Lock()
+        self._speculations = OrderedDict()  # session_id -> Future of {model input row: predicted_intake}
+        self.counters = {
+            "batches": 0,
+            "rows": 0,
+            "completions": 0,
+            "hits": 0,
+            "hits_after_wait": 0,
+            "misses_not_speculated": 0,
+            "misses_other_answer": 0,
+            "errors": 0,
+        }
+
+    def answer_options(self, field, values):
+        """Raw answers the dialog could still receive for `field`, or None if it is open-ended."""
+        if field == "sub_activity":
+            return SUB_ACTIVITY_OPTIONS.get(values["activity"])
+        if field in SPECULATED_FIELDS:
+            return SWEEP_DEFAULT_VALUES[field]
+        return None
+
+    def maybe_speculate(self, session_id, record, fallback=None):
+        """Starts a background batch for this session if its remaining answers can be enumerated."""
+        if not self.enabled or not hydration_service.ready:
+            return False
+        with self._lock:
+            if session_id in self._speculations:
+                return False
+
+        missing = feature_normalizer.missing(record, fallback)
+        # sub_activity options depend on the activity answer, so wait until that is known
+        if not missing or ("activity" in missing and "sub_activity" in missing):
+            return False
+        options = [self.answer_options(field, record["values"]) for field in missing]
+        if any(not field_options for field_options in options):
+            return False
+        combinations = 1
+        for field_options in options:
+            combinations *= len(field_options)
+        if combinations > SPECULATION_MAX_COMBINATIONS:
+            return False
+
+        values_list = []
+        for combo in itertools.product(*options):
+            candidate = {"values": dict(record["values"]), "valid": {}}
+            for field, value in zip(missing, combo):
+                feature_normalizer.update(candidate, field, value)
+            values_list.append(candidate["values"])
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=SPECULATION_WORKERS, thread_name_prefix="speculation")
+        future = self._executor.submit(self.predict_batch, values_list)
+        with self._lock:
+            self._speculations[session_id] = future
+            while len(self._speculations) > SPECULATION_MAX_SESSIONS:
+                self._speculations.popitem(last=False)
+            self.counters["batches"] += 1
+            self.counters["rows"] += len(values_list)
+        return True
+
+    def predict_batch(self, values_list):
+        X, _, _ = hydration_service.build_model_input(values_list)
+        predictions = hydration_service.predict_rows(X)
+        return {tuple(row): predicted_intake for row, predicted_intake in zip(X.tolist(), predictions)}
+
+    def discard(self, session_id):
+        with self._lock:
+            future = self._speculations.pop(session_id, None)
+        if future is not None:
+            future.cancel()
+
+    def take(self, session_id, values):
+        """Returns (future, row, details, intensity_score) for the completion turn; future is None if nothing was speculated."""
+        with self._lock:
+            future = self._speculations.pop(session_id, None)
+            self.counters["completions"] += 1
+            if future is None:
+                self.counters["misses_not_speculated"] += 1
+        X, details, intensity_scores = hydration_service.build_model_input([values])
+        return future, tuple(X[0].tolist()), details[0], intensity_scores[0]
+
+    def resolve(self, predictions, waited, values, row, detailed_activity, intensity_score):
+        with self._lock:
+            if predictions is None:
+                self.counters["errors"] += 1
+                return None
+            if row not in predictions:
+                self.counters["misses_other_answer"] += 1
+                return None
+            self.counters["hits_after_wait" if waited else "hits"] += 1
+        return hydration_service.build_result(values, detailed_activity, intensity_score, predictions[row])
+
+    def lookup(self, session_id, values):
+        """The speculated predict_intake result for these final values, or None (caller predicts normally)."""
+        future, row, detailed_activity, intensity_score = self.take(session_id, values)
+        if future is None:
+            return None
+        waited = not future.done()
+        try:
+            predictions = future.result(timeout=SPECULATION_WAIT_SECONDS)
+        except Exception as e:
+            print(f"⚠️  Speculative prediction unavailable: {e!r}")
+            predictions = None
+        return self.resolve(predictions, waited, values, row, detailed_activity, intensity_score)
+
+    async def lookup_async(self, session_id, values):
+        future, row, detailed_activity, intensity_score = self.take(session_id, values)
+        if future is None:
+            return None
+        waited = not future.done()
+        try:
+            predictions = await asyncio.wait_for(asyncio.wrap_future(future), SPECULATION_WAIT_SECONDS)
+        except Exception as e:
+            print(f"⚠️  Speculative prediction unavailable: {e!r}")
+            predictions = None
+        return self.resolve(predictions, waited, values, row, detailed_activity, intensity_score)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        with self._lock:
+            self._speculations.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["pending_sessions"] = len(self._speculations)
+        served = stats["hits"] + stats["hits_after_wait"]
+        stats["hit_rate"] = round(served / stats["completions"], 4) if stats["completions"] else None
+        stats["enabled"] = self.enabled
+        return stats
+
+speculation_service = SpeculationService()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests run against the NumPy backend: no TensorFlow start-up, same predictions (see golden.py)
+os.environ.setdefault("INFERENCE_BACKEND", "numpy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
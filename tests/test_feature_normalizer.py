@@ -0,0 +1,138 @@
+"""FeatureNormalizer against the parsing it replaced (HydrationService before the normalizer), on the golden corpus."""
+import re
+
+import pytest
+
+from config import (
+    REQUIRED_FEATURES, DEFAULT_VALUES, GENDER_MAP, ACTIVITY_MAP, COMPLICATION_MAP,
+    INDOORS_MAP, WET_GROUND_MAP, BINARY_MAP
+)
+from golden import build_corpus
+from services.feature_normalizer import feature_normalizer
+
+
+# --- Previous implementation, kept verbatim as the reference ---
+
+def legacy_parse_numeric_text(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r"[-+]?\d*\.?\d+", str(value))
+    if match:
+        return float(match.group())
+    return None
+
+
+def legacy_parse_int(value):
+    try:
+        return int(value)
+    except:
+        return None
+
+
+def legacy_parse_float(value):
+    try:
+        return float(value)
+    except:
+        return None
+
+
+def legacy_values(data):
+    complication_str_raw = data.get("complication", "").lower()
+    if complication_str_raw in COMPLICATION_MAP:
+        complication = COMPLICATION_MAP[complication_str_raw]
+    elif any(word in complication_str_raw for word in ["diabetes", "renal", "kidney", "heart"]):
+        complication = 2
+    else:
+        complication = 0
+    return {
+        "age": legacy_parse_int(data.get("age")) or DEFAULT_VALUES["age"],
+        "weight": legacy_parse_float(data.get("weight")) or DEFAULT_VALUES["weight"],
+        "gender": GENDER_MAP.get(data.get("gender", "").lower(), DEFAULT_VALUES["gender"]),
+        "humidity_scale": legacy_parse_int(data.get("humidity_scale")) or DEFAULT_VALUES["humidity_scale"],
+        "temperature": legacy_parse_numeric_text(data.get("temperature")) or DEFAULT_VALUES["temperature"],
+        "activity": ACTIVITY_MAP.get(data.get("activity", "").lower(), DEFAULT_VALUES["activity"]),
+        "sub_activity": data.get("sub_activity", "Yoga/Stretching"),
+        "complication": complication,
+        "is_indoors": INDOORS_MAP.get(data.get("is_indoors", "").lower(), DEFAULT_VALUES["is_indoors"]),
+        "is_ground_wet": WET_GROUND_MAP.get(data.get("is_ground_wet", "").lower(), DEFAULT_VALUES["is_ground_wet"]),
+        "is_windy_or_fanned": BINARY_MAP.get(data.get("is_windy_or_fanned", "").lower(), DEFAULT_VALUES["is_windy_or_fanned"]),
+        "is_direct_sun": BINARY_MAP.get(data.get("is_direct_sun", "").lower(), DEFAULT_VALUES["is_direct_sun"]),
+    }
+
+
+def legacy_first_missing(session_data, local_data):
+    all_data = {k: v.lower() if isinstance(v, str) else v for k, v in local_data.items()}
+    all_data.update(session_data)
+    for feature in REQUIRED_FEATURES:
+        value = all_data.get(feature)
+        if value is None or (isinstance(value, str) and value.strip() == ""):
+            return feature
+        if feature in ["age", "weight", "humidity", "temperature"] and legacy_parse_numeric_text(value) is None:
+            return feature
+        if feature == "gender" and str(value).lower() not in GENDER_MAP:
+            return feature
+        if feature == "activity" and str(value).lower() not in ACTIVITY_MAP:
+            return feature
+        if feature == "is_indoors" and str(value).lower() not in INDOORS_MAP:
+            return feature
+        if feature == "is_ground_wet" and str(value).lower() not in WET_GROUND_MAP:
+            return feature
+        if feature in ["is_windy_or_fanned", "is_direct_sun"] and str(value).lower() not in BINARY_MAP:
+            return feature
+    return None
+
+
+# --- Inputs: the golden corpus plus messy variants of it ---
+
+MESSY_VALUES = {
+    "age": ["", "  ", "abc", "25 years", "0", 31, "30.5"],
+    "weight": ["", "70kg", "abc", 65.5, "0"],
+    "gender": ["", "MALE", "Female", "other"],
+    "temperature": ["", "31C", "hot", 28, "-5"],
+    "humidity_scale": ["", "x", "3", 4, "0"],
+    "activity": ["", "HIGH", "extreme"],
+    "complication": ["", "Mild", "chronic kidney issue", "asthma"],
+    "is_indoors": ["", "Outdoors", "maybe"],
+    "is_direct_sun": ["", "YES", "sometimes"],
+}
+
+
+def messy_corpus():
+    corpus = build_corpus()
+    profiles = list(corpus)
+    for i, profile in enumerate(corpus[::7]):
+        for field, values in MESSY_VALUES.items():
+            messy = dict(profile)
+            messy[field] = values[i % len(values)]
+            profiles.append(messy)
+        partial = {key: value for j, (key, value) in enumerate(profile.items()) if (i + j) % 3}
+        profiles.append(partial)
+    return profiles
+
+
+PROFILES = messy_corpus()
+
+
+def test_corpus_covers_messy_inputs():
+    assert len(PROFILES) > len(build_corpus())
+
+
+@pytest.mark.parametrize("chunk", range(8))
+def test_values_match_legacy_parsing(chunk):
+    for profile in PROFILES[chunk::8]:
+        assert feature_normalizer.normalize(profile)["values"] == legacy_values(profile), profile
+
+
+@pytest.mark.parametrize("chunk", range(8))
+def test_first_missing_matches_legacy_validation(chunk):
+    profiles = PROFILES[chunk::8]
+    for session_data, local_data in zip(profiles, profiles[1:] + [{}]):
+        # The dialog stores answers lowercased; the frontend's local data arrives as sent
+        session_data = {k: v for k, v in session_data.items() if k in ("age", "weight", "gender")}
+        expected = legacy_first_missing(session_data, local_data)
+        actual = feature_normalizer.first_missing(
+            feature_normalizer.normalize(session_data), feature_normalizer.normalize(local_data)
+        )
+        assert actual == expected, (session_data, local_data)
@@ -0,0 +1,127 @@
+"""OllamaPool routing, session affinity and failover against ollama_standin.py servers."""
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import ollama
+import pytest
+
+from config import OLLAMA_BACKEND_FAILURE_THRESHOLD
+from ollama_standin import StandInServer, build_handler
+from services.ollama_pool import OllamaPool
+
+MODEL = "standin-model"
+GENERATION_SECONDS = 0.3
+
+
+@pytest.fixture
+def standins():
+    """Starts stand-in servers on free ports; returns a function that adds one and gives its URL."""
+    servers = []
+
+    def start(delay=GENERATION_SECONDS, fail_every=0):
+        server = StandInServer(("127.0.0.1", 0), build_handler(f"standin-{len(servers)}", delay, 0.0, fail_every, MODEL))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def make_pool(urls, **kwargs):
+    pool = OllamaPool(urls, **kwargs)
+    pool.connect()
+    return pool
+
+
+def chat(pool, content, session_id=None):
+    response = pool.chat(session_id=session_id, model=MODEL, messages=[{"role": "user", "content": content}])
+    return response["message"]["content"]
+
+
+def backend_requests(pool):
+    return [backend["requests"] for backend in pool.stats()["backends"]]
+
+
+def test_least_outstanding_spreads_concurrent_requests(standins):
+    pool = make_pool([standins() for _ in range(3)], routing="least_outstanding", session_affinity=False)
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        replies = list(executor.map(lambda i: chat(pool, f"q{i}"), range(6)))
+
+    # Every request was in flight at once, so each backend got two
+    assert backend_requests(pool) == [2, 2, 2]
+    assert sorted(reply.split("] ")[1] for reply in replies) == [f"q{i}" for i in range(6)]
+    assert all(backend["outstanding"] == 0 for backend in pool.stats()["backends"])
+
+
+def test_session_affinity_keeps_a_session_on_its_backend(standins):
+    pool = make_pool([standins(delay=0.0) for _ in range(3)], session_affinity=True)
+
+    served_by = {chat(pool, f"turn {i}", session_id="alice").split("]")[0] for i in range(5)}
+
+    assert len(served_by) == 1
+    assert sorted(backend_requests(pool)) == [0, 0, 5]
+    assert sum(backend["affinity_hits"] for backend in pool.stats()["backends"]) == 4
+
+
+def test_affinity_yields_to_a_much_busier_backend(standins):
+    pool = make_pool([standins(), standins()], session_affinity=True)
+    first = pool.acquire("alice")
+    # Load alice's backend beyond OLLAMA_AFFINITY_SLACK; the next turn moves to the idle one
+    first.outstanding += 3
+
+    second = pool.acquire("alice")
+
+    assert second is not first
+
+
+def test_connection_failure_fails_over_and_marks_the_backend_down(standins):
+    dead, live = closed_port_url(), standins(delay=0.0)
+    pool = make_pool([dead, live], session_affinity=False)
+
+    replies = [chat(pool, f"q{i}") for i in range(2 * OLLAMA_BACKEND_FAILURE_THRESHOLD)]
+
+    assert all(reply.endswith(f"q{i}") for i, reply in enumerate(replies))
+    stats = pool.stats()
+    dead_stats = next(backend for backend in stats["backends"] if backend["url"] == dead)
+    assert stats["failovers"] == OLLAMA_BACKEND_FAILURE_THRESHOLD
+    assert dead_stats["failures"] == OLLAMA_BACKEND_FAILURE_THRESHOLD
+    assert not dead_stats["available"]
+
+
+def test_no_backend_available_raises_connection_error():
+    pool = make_pool([closed_port_url()])
+
+    with pytest.raises(ConnectionError):
+        chat(pool, "hello")
+
+
+def test_server_error_is_not_retried_but_counts_against_health(standins):
+    pool = make_pool([standins(delay=0.0, fail_every=1)])
+
+    with pytest.raises(ollama.ResponseError):
+        chat(pool, "hello")
+
+    backend = pool.stats()["backends"][0]
+    assert pool.stats()["failovers"] == 0
+    assert backend["failures"] == 1 and backend["consecutive_failures"] == 1
+
+
+def test_probe_reports_reachability(standins):
+    live, dead = standins(delay=0.0), closed_port_url()
+    pool = make_pool([live, dead])
+
+    results = {result["url"]: result["reachable"] for result in pool.probe()}
+
+    assert results == {live: True, dead: False}
@@ -0,0 +1,99 @@
+"""SingleFlight: identical concurrent calls run once, for threads and coroutines."""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.single_flight import SingleFlight, payload_key
+
+CALLERS = 8
+
+
+def run_concurrently(flight, key, fn):
+    # The barrier lines the callers up so they all join while the leader's call is in flight
+    barrier = threading.Barrier(CALLERS)
+
+    def call():
+        barrier.wait()
+        return flight.run(key, fn)
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        futures = [pool.submit(call) for _ in range(CALLERS)]
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_identical_concurrent_calls_run_once():
+    flight = SingleFlight()
+    executions = []
+
+    def generate():
+        executions.append(1)
+        time.sleep(0.2)
+        return {"message": "shared"}
+
+    results = run_concurrently(flight, payload_key("model", [{"role": "user", "content": "hi"}]), generate)
+
+    assert len(executions) == 1
+    assert all(result == {"message": "shared"} for result in results)
+    stats = flight.stats()
+    assert stats["calls"] == CALLERS and stats["executions"] == 1
+    assert stats["coalesced"] == CALLERS - 1 and stats["in_flight"] == 0
+
+
+def test_error_is_shared_and_not_cached():
+    flight = SingleFlight()
+    executions = []
+
+    def fail():
+        executions.append(1)
+        time.sleep(0.2)
+        raise ConnectionError("backend down")
+
+    results = run_concurrently(flight, "key", fail)
+
+    assert len(executions) == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
+    # Nothing is kept once the call finished: the next call runs again
+    assert flight.run("key", lambda: "ok") == "ok"
+    assert flight.stats()["executions"] == 2
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight()
+    assert [flight.run(key, lambda key=key: key) for key in ("a", "b")] == ["a", "b"]
+    assert flight.stats()["executions"] == 2
+
+
+def test_disabled_runs_every_call():
+    flight = SingleFlight(enabled=False)
+    executions = []
+
+    def generate():
+        executions.append(1)
+        time.sleep(0.05)
+        return "x"
+
+    run_concurrently(flight, "key", generate)
+    assert len(executions) == CALLERS
+
+
+def test_concurrent_coroutines_run_once():
+    flight = SingleFlight()
+    executions = []
+
+    async def generate():
+        executions.append(1)
+        await asyncio.sleep(0.2)
+        return "shared"
+
+    async def main():
+        return await asyncio.gather(*[flight.run_async("key", generate) for _ in range(CALLERS)])
+
+    assert asyncio.run(main()) == ["shared"] * CALLERS
+    assert len(executions) == 1
+    assert flight.stats()["coalesced"] == CALLERS - 1
+
+
+def test_payload_key_ignores_dict_order():
+    assert payload_key({"a": 1, "b": 2}) == payload_key({"b": 2, "a": 1})
+    assert payload_key({"a": 1}) != payload_key({"a": 2})
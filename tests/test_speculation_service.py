@@ -0,0 +1,72 @@
+"""SpeculationService hit / miss accounting against the NumPy-backed model."""
+import pytest
+
+from golden import build_corpus
+from services.feature_normalizer import feature_normalizer
+from services.hydration_service import hydration_service
+from services.speculation_service import SpeculationService
+
+# Left unanswered, so the speculation batch enumerates 2 x 2 combinations
+OPEN_FIELDS = ["is_windy_or_fanned", "is_direct_sun"]
+
+
+@pytest.fixture
+def speculation():
+    assert hydration_service.ready
+    service = SpeculationService()
+    service.enabled = True
+    yield service
+    service.shutdown()
+
+
+@pytest.fixture
+def profile():
+    return dict(build_corpus()[0])
+
+
+def speculate(service, session_id, profile):
+    answered = {key: value for key, value in profile.items() if key not in OPEN_FIELDS}
+    assert service.maybe_speculate(session_id, feature_normalizer.normalize(answered))
+
+
+def test_hit_matches_predict_intake(speculation, profile):
+    speculate(speculation, "s1", profile)
+    final = dict(profile, is_windy_or_fanned="yes", is_direct_sun="no")
+    values = feature_normalizer.normalize(final)["values"]
+
+    result = speculation.lookup("s1", values)
+
+    expected = hydration_service.predict_intake(final)
+    assert result is not None
+    assert result["predicted_intake"] == pytest.approx(expected["predicted_intake"], abs=1e-3)
+    assert result["intensity_score"] == expected["intensity_score"]
+    stats = speculation.stats()
+    assert stats["batches"] == 1 and stats["rows"] == 4
+    assert stats["hits"] + stats["hits_after_wait"] == 1
+    assert stats["misses_other_answer"] == 0 and stats["misses_not_speculated"] == 0
+
+
+def test_changed_answer_is_a_miss(speculation, profile):
+    speculate(speculation, "s2", profile)
+    # An already-answered field changed after the batch was built: its row wasn't predicted
+    changed = dict(profile, is_windy_or_fanned="no", is_direct_sun="yes", age="71")
+    values = feature_normalizer.normalize(changed)["values"]
+
+    assert speculation.lookup("s2", values) is None
+    stats = speculation.stats()
+    assert stats["misses_other_answer"] == 1
+    assert stats["hits"] + stats["hits_after_wait"] == 0
+
+
+def test_session_without_batch_is_a_miss(speculation, profile):
+    values = feature_normalizer.normalize(profile)["values"]
+
+    assert speculation.lookup("never-speculated", values) is None
+    assert speculation.stats()["misses_not_speculated"] == 1
+
+
+def test_open_ended_question_is_not_speculated(speculation, profile):
+    answered = {key: value for key, value in profile.items() if key != "age"}
+
+    assert not speculation.maybe_speculate("s3", feature_normalizer.normalize(answered))
+    assert speculation.stats()["batches"] == 0